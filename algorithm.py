@@ -1,88 +1,1156 @@
+import bisect
+import heapq
 import itertools
+import math
 import random
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Optional
+import numpy as np
 from ortools.sat.python import cp_model
 import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from design_library import get_default_library
 
-def compute_optimized_samples(selected_samples, k, j, s, max_time=60):
+# Upper bound on the number of (k-group, j-subset) cells compared per
+# vectorized block, keeps the temporary AND/popcount arrays around 64 MB.
+COVERAGE_BLOCK_CELLS = 1 << 23
+
+# Below this many coverage entries a process pool costs more than it saves
+PARALLEL_COVERAGE_MIN_NONZEROS = 4_000_000
+
+# Cap on the (candidate, j-subset, element) cells ranked per pick in
+# generate_coverage_k_groups: fewer candidates when groups cover a lot.
+CANDIDATE_CELLS = 1 << 20
+
+# Default ceiling for the coverage matrix and its construction buffers,
+# leaves room for CP-SAT on an 8 GB worker.
+DEFAULT_MEMORY_LIMIT = 3 << 30
+
+def subset_mask(indices):
     """
-    Hybrid greedy hint + CP-SAT for exact set cover with upper bound.
-    selected_samples: list of sample values.
+    Encode a collection of sample indices as an integer bitmask.
     """
-    samples = selected_samples
-    n = len(samples)
+    mask = 0
+    for idx in indices:
+        mask |= 1 << idx
+    return mask
 
-    # Generate j-subsets and k-groups
-    j_subsets = list(itertools.combinations(range(n), j))
-    k_groups = list(itertools.combinations(range(n), k))
+def _mask_array(subsets, n):
+    dtype = np.uint32 if n <= 32 else np.uint64
+    return np.fromiter((subset_mask(sub) for sub in subsets), dtype=dtype, count=len(subsets))
+
+def _popcount(arr):
+    """
+    Vectorized popcount of an unsigned integer array.
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(arr)
+    # NumPy < 2.0: sum a byte lookup table over the raw bytes
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    as_bytes = arr.view(np.uint8).reshape(arr.shape + (arr.dtype.itemsize,))
+    return table[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+def colex_rank(subset):
+    """
+    Rank of a sorted index subset in colexicographic order
+    (combinatorial number system): sum of C(c_i, i + 1).
+    """
+    return sum(math.comb(c, i + 1) for i, c in enumerate(subset))
+
+def colex_combinations(n, r):
+    """
+    All r-subsets of range(n) in colex order, so position == colex_rank.
+    """
+    if r == 0:
+        return [()]
+    combos = []
+    for last in range(r - 1, n):
+        combos.extend(prefix + (last,) for prefix in colex_combinations(last, r - 1))
+    return combos
+
+def colex_unrank(rank, r):
+    """
+    Inverse of colex_rank: the sorted r-subset with the given colex rank.
+    """
+    subset = []
+    for i in range(r, 0, -1):
+        c = i - 1
+        while math.comb(c + 1, i) <= rank:
+            c += 1
+        subset.append(c)
+        rank -= math.comb(c, i)
+    return tuple(reversed(subset))
+
+def _binomial_table(n, r):
+    # table[a, b] = C(a, b) for 0 <= a <= n, 0 <= b <= r
+    return np.array([[math.comb(a, b) for b in range(r + 1)] for a in range(n + 1)], dtype=np.int64)
+
+def _coverage_template(n, k, j, s):
+    """
+    Position pattern of the j-subsets covered by any k-group.
+    Positions < k refer to the group's own elements, positions >= k to its
+    complement; a covered j-subset takes t >= s from the group and j - t
+    from the complement.
+    """
+    rows = []
+    for t in range(s, min(k, j) + 1):
+        if j - t > n - k:
+            continue
+        for inside in itertools.combinations(range(k), t):
+            for outside in itertools.combinations(range(k, n), j - t):
+                rows.append(inside + outside)
+    return np.array(rows, dtype=np.int64).reshape(len(rows), j)
+
+def coverage_per_group(n, k, j, s):
+    """
+    Number of j-subsets covered by a single k-group (the same for all groups).
+    """
+    return sum(math.comb(k, t) * math.comb(n - k, j - t) for t in range(s, min(k, j) + 1))
+
+def _index_dtype(size):
+    return np.uint32 if size <= np.iinfo(np.uint32).max else np.uint64
+
+def estimate_coverage_bytes(n, num_groups, j, s, k):
+    """
+    Peak memory needed to build a CoverageMatrix for num_groups k-groups:
+    both index arrays, their offsets, the int64 permutation used for the
+    transpose and the int64 scratch arrays of one enumeration block.
+    """
+    nnz = num_groups * coverage_per_group(n, k, j, s)
+    group_item = np.dtype(_index_dtype(math.comb(n, j))).itemsize
+    subset_item = np.dtype(_index_dtype(num_groups)).itemsize
+    offsets = 8 * (num_groups + math.comb(n, j) + 2)
+    scratch = 3 * 8 * COVERAGE_BLOCK_CELLS
+    return nnz * (group_item + subset_item + 8) + offsets + scratch
+
+class CoverageMatrix:
+    """
+    Coverage relation between k-groups and j-subsets stored as two CSR
+    arrays of unsigned ints: group -> covered j-subset ranks and the
+    transpose, j-subset rank -> covering groups.
+    """
+    def __init__(self, num_groups, num_subsets, group_offsets, group_subsets, subset_offsets, subset_groups):
+        self.num_groups = num_groups
+        self.num_subsets = num_subsets
+        self.group_offsets = group_offsets
+        self.group_subsets = group_subsets
+        self.subset_offsets = subset_offsets
+        self.subset_groups = subset_groups
+
+    @property
+    def nnz(self):
+        return len(self.group_subsets)
+
+    @property
+    def nbytes(self):
+        return sum(arr.nbytes for arr in (self.group_offsets, self.group_subsets,
+                                          self.subset_offsets, self.subset_groups))
+
+    def covered_by(self, group_idx):
+        """Colex ranks of the j-subsets covered by a group."""
+        return self.group_subsets[self.group_offsets[group_idx]:self.group_offsets[group_idx + 1]]
+
+    def covering(self, subset_idx):
+        """Indices of the groups covering a j-subset."""
+        return self.subset_groups[self.subset_offsets[subset_idx]:self.subset_offsets[subset_idx + 1]]
+
+def _scan_coverage(n, k_groups, j, s):
+    """
+    Bitmask scan: popcount(kg & js) >= s against every j-subset.
+    Yields blocks of covered ranks, one row per group.
+    """
+    j_masks = _mask_array(colex_combinations(n, j), n)
+    k_masks = _mask_array(k_groups, n)
+
+    block = max(1, COVERAGE_BLOCK_CELLS // len(j_masks))
+    for start in range(0, len(k_masks), block):
+        shared = k_masks[start:start + block, None] & j_masks[None, :]
+        hits = _popcount(shared) >= s
+        yield np.nonzero(hits)[1].reshape(len(hits), -1)
+
+def _enumerate_coverage(n, k_groups, j, s):
+    """
+    Direct enumeration: build each group's covered j-subsets from the
+    coverage template and rank them, without touching uncovered subsets.
+    Yields blocks of covered ranks, one row per group.
+    """
+    k = len(k_groups[0])
+    template = _coverage_template(n, k, j, s)
+    binom = _binomial_table(n, j)
+    groups = np.array(k_groups, dtype=np.int64).reshape(len(k_groups), k)
+
+    block = max(1, COVERAGE_BLOCK_CELLS // max(1, template.size))
+    for start in range(0, len(groups), block):
+        yield _rank_coverage(n, groups[start:start + block], template, binom)
+
+def _rank_coverage(n, groups, template, binom):
+    # sorted colex ranks covered by each row of an int64 (m, k) group array
+    member = np.zeros((len(groups), n), dtype=bool)
+    member[np.arange(len(groups))[:, None], groups] = True
+    # group elements first, then the complement, both ascending
+    order = np.argsort(~member, axis=1, kind='stable')
+    covered = np.sort(order[:, template], axis=-1)
+    ranks = binom[covered, np.arange(1, template.shape[1] + 1)].sum(axis=-1)
+    ranks.sort(axis=1)
+    return ranks
+
+def process_context():
+    """
+    multiprocessing context for the solver's process pools. Callers (the
+    GUI's solver thread, the HTTP service) are multi-threaded and forking
+    those is unsafe, so forkserver where the platform has it, else spawn.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+def _fill_coverage_shard(shm_name, dtype, size, offset, n, groups, j, s, method):
+    # worker: write the covered ranks of groups into the shared group-major array
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(size, dtype=dtype, buffer=shm.buf)
+        blocks = _scan_coverage(n, groups, j, s) if method == "bitmask" else _enumerate_coverage(n, groups, j, s)
+        for ranks in blocks:
+            out[offset:offset + ranks.size] = ranks.ravel()
+            offset += ranks.size
+        del out
+    finally:
+        shm.close()
+
+def _parallel_group_subsets(n, k_groups, j, s, method, per_group, dtype, workers):
+    """
+    Shard the k-groups into contiguous ranges and let a process pool write
+    each range's covered ranks straight into one shared-memory array.
+    Every group covers per_group subsets, so shard offsets are known up front.
+    """
+    size = len(k_groups) * per_group
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, size * dtype.itemsize))
+    try:
+        # a few shards per worker evens out the load
+        shards = min(len(k_groups), workers * 4)
+        bounds = [len(k_groups) * i // shards for i in range(shards + 1)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=process_context()) as pool:
+            futures = [pool.submit(_fill_coverage_shard, shm.name, dtype.str, size, lo * per_group,
+                                   n, k_groups[lo:hi], j, s, method)
+                       for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+            for future in futures:
+                future.result()
+        shared = np.ndarray(size, dtype=dtype, buffer=shm.buf)
+        group_subsets = shared.copy()
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+    return group_subsets
+
+def build_coverage(n, k_groups, j, s, method="enumerate", memory_limit=DEFAULT_MEMORY_LIMIT, workers=None):
+    """
+    Coverage engine.
+    Returns a CoverageMatrix relating every k-group to the colex ranks of
+    the j-subsets it shares at least s elements with, plus the transposed
+    j-subset -> groups index built in the same pass.
+    method="enumerate" constructs coverage directly, method="bitmask" scans
+    all C(n, j) subsets with popcount.
+    workers: processes used for the group-major pass, None uses every CPU
+    once the matrix has PARALLEL_COVERAGE_MIN_NONZEROS entries; smaller
+    instances are always built in-process.
+    Raises MemoryError if the estimated footprint exceeds memory_limit bytes.
+    """
+    num_groups = len(k_groups)
+    num_subsets = math.comb(n, j)
+    k = len(k_groups[0]) if k_groups else j
+    per_group = coverage_per_group(n, k, j, s)
+    if memory_limit is not None:
+        needed = estimate_coverage_bytes(n, num_groups, j, s, k)
+        if needed > memory_limit:
+            raise MemoryError(
+                f"Coverage matrix for {num_groups} groups needs about {needed / 2**30:.1f} GB "
+                f"(limit {memory_limit / 2**30:.1f} GB)")
+    if method not in ("bitmask", "enumerate"):
+        raise ValueError(f"Unknown coverage method: {method}")
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if num_groups * per_group < PARALLEL_COVERAGE_MIN_NONZEROS:
+        workers = 1
+
+    # Every group covers exactly per_group subsets, so the group-major
+    # arrays can be preallocated and filled block by block
+    group_offsets = np.arange(num_groups + 1, dtype=np.int64) * per_group
+    if workers > 1:
+        group_subsets = _parallel_group_subsets(n, k_groups, j, s, method, per_group,
+                                                _index_dtype(num_subsets), workers)
+    else:
+        if not k_groups:
+            blocks = []
+        elif method == "bitmask":
+            blocks = _scan_coverage(n, k_groups, j, s)
+        else:
+            blocks = _enumerate_coverage(n, k_groups, j, s)
+        group_subsets = np.empty(num_groups * per_group, dtype=_index_dtype(num_subsets))
+        pos = 0
+        for ranks in blocks:
+            group_subsets[pos:pos + ranks.size] = ranks.ravel()
+            pos += ranks.size
+
+    # Transpose: bucket each (group, rank) pair by rank
+    subset_offsets = np.zeros(num_subsets + 1, dtype=np.int64)
+    np.cumsum(np.bincount(group_subsets, minlength=num_subsets), out=subset_offsets[1:])
+    order = np.argsort(group_subsets, kind='stable')
+    if per_group:
+        order //= per_group
+    subset_groups = order.astype(_index_dtype(num_groups))
+    del order
+    return CoverageMatrix(num_groups, num_subsets, group_offsets, group_subsets, subset_offsets, subset_groups)
 
-    # Compute coverage for each k-group
-    group_cov = []
-    for kg in k_groups:
-        cov_js = [idx for idx, js in enumerate(j_subsets) if len(set(kg) & set(js)) >= s]
-        group_cov.append(cov_js)
+def canonical_groups(n, k):
+    """
+    Orbit representatives used for symmetry breaking. Every permutation of
+    the n indices maps covers to covers, so any cover can be relabelled to
+    contain the first group (0..k-1), and, if it has two or more groups,
+    also one second group (0..t-1, k..2k-t-1) for some overlap t < k.
+    Returns (first_group, second_group_options).
+    """
+    first = tuple(range(k))
+    seconds = [tuple(range(t)) + tuple(range(k, 2 * k - t)) for t in range(max(0, 2 * k - n), k)]
+    return first, seconds
+
+def _add_symmetry_breaking(model, x_vars, n, k_groups, coverage):
+    # k_groups comes from itertools.combinations, i.e. sorted lexicographically
+    first, seconds = canonical_groups(n, len(k_groups[0]))
+    first_idx = bisect.bisect_left(k_groups, first)
+    model.Add(x_vars[first_idx] == 1)
+    if len(coverage.covered_by(first_idx)) < coverage.num_subsets:
+        model.AddBoolOr([x_vars[bisect.bisect_left(k_groups, grp)] for grp in seconds])
+
+def canonicalize_cover(groups, n):
+    """
+    Relabel a cover so it satisfies the symmetry-breaking constraints:
+    its first group becomes (0..k-1) and its second one the orbit
+    representative with the same overlap (see canonical_groups).
+    """
+    if not groups:
+        return []
+    first = list(groups[0])
+    second = list(groups[1]) if len(groups) > 1 else []
+    shared = [x for x in first if x in second]
+    # shared -> 0..t-1, rest of first -> t..k-1, rest of second -> k..2k-t-1
+    order = (shared + [x for x in first if x not in shared]
+             + [x for x in second if x not in shared]
+             + [x for x in range(n) if x not in first and x not in second])
+    relabel = {old: new for new, old in enumerate(order)}
+    return [tuple(sorted(relabel[x] for x in grp)) for grp in groups]
 
-    # Filter out groups that cover nothing
-    valid_idx = [i for i, covs in enumerate(group_cov) if covs]
-    k_groups = [k_groups[i] for i in valid_idx]
-    group_cov = [group_cov[i] for i in valid_idx]
+def greedy_cover(coverage, start=()):
+    """
+    Lazy-priority-queue greedy max coverage over a CoverageMatrix: repeatedly
+    take the group covering the most still-uncovered j-subsets. Stale heap
+    gains are upper bounds, so a group is only re-evaluated when it reaches
+    the top. start: group indices that must be taken first.
+    Returns the chosen group indices in selection order.
+    """
+    covered = np.zeros(coverage.num_subsets, dtype=bool)
+    remaining = coverage.num_subsets
+    chosen = []
+    for g in start:
+        subsets = coverage.covered_by(g)
+        remaining -= np.count_nonzero(~covered[subsets])
+        covered[subsets] = True
+        chosen.append(g)
+
+    heap = [(-len(coverage.covered_by(g)), g) for g in range(coverage.num_groups)]
+    heapq.heapify(heap)
+    while remaining and heap:
+        _, g = heapq.heappop(heap)
+        subsets = coverage.covered_by(g)
+        gain = np.count_nonzero(~covered[subsets])
+        if not gain:
+            continue
+        if heap and gain < -heap[0][0]:
+            heapq.heappush(heap, (-gain, g))
+            continue
+        covered[subsets] = True
+        remaining -= gain
+        chosen.append(g)
+    return chosen
+
+def schonheim_bound(n, k, t):
+    """
+    Schönheim lower bound for (n, k, t) covering designs:
+    ceil(n/k * ceil((n-1)/(k-1) * ... ceil((n-t+1)/(k-t+1)))).
+    """
+    bound = 1
+    for i in reversed(range(t)):
+        bound = -(-(n - i) * bound // (k - i))
+    return bound
 
-    # Build CP-SAT model
+def lower_bound(n, k, j, s):
+    """
+    Combinatorial lower bound on the number of k-groups needed so that
+    every j-subset shares at least s elements with one of them.
+    Counting bound: ceil(C(n, j) / coverage_per_group). The instance is
+    symmetric, so the LP relaxation optimum is exactly C(n, j) divided by
+    coverage_per_group (uniform primal and dual solutions attain it) and
+    this is also the LP bound. For s == j the problem is a classical
+    covering design and the Schönheim bound applies as well.
+    """
+    num_subsets = math.comb(n, j)
+    if not num_subsets:
+        return 0
+    per_group = coverage_per_group(n, k, j, s)
+    if not per_group:
+        return 0
+    bound = max(1, -(-num_subsets // per_group))
+    if s == j and k < n:
+        bound = max(bound, schonheim_bound(n, k, j))
+    return bound
+
+def _cover_result(groups, status, bound):
+    return {
+        'groups': groups,
+        'status': status,
+        'optimal': status == "OPTIMAL",
+        'lower_bound': bound,
+        'gap': len(groups) - bound,
+    }
+
+class CancellationToken:
+    """
+    Cooperative cancellation for solve_cover, safe to trigger from another
+    thread: cancel() stops a running CP-SAT search with StopSearch() and
+    the solver returns its best-so-far cover.
+    """
+    def __init__(self):
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._solvers = []
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            for solver in self._solvers:
+                solver.StopSearch()
+
+    def attach(self, solver):
+        with self._lock:
+            self._solvers.append(solver)
+            if self.cancelled:
+                solver.StopSearch()
+
+    def detach(self, solver):
+        with self._lock:
+            self._solvers.remove(solver)
+
+class IncumbentCallback(cp_model.CpSolverSolutionCallback):
+    """
+    Stream every improved CP-SAT incumbent to progress_callback as a dict
+    with the objective, best bound, wall time and the chosen groups.
+    """
+    def __init__(self, x_vars, k_groups, progress_callback, lower=0):
+        super().__init__()
+        self.x_vars = x_vars
+        self.k_groups = k_groups
+        self.progress_callback = progress_callback
+        self.lower = lower
+
+    def on_solution_callback(self):
+        groups = [grp for var, grp in zip(self.x_vars, self.k_groups) if self.BooleanValue(var)]
+        self.progress_callback({
+            'objective': int(round(self.ObjectiveValue())),
+            'bound': max(self.lower, math.ceil(self.BestObjectiveBound() - 1e-6)),
+            'wall_time': self.WallTime(),
+            'groups': groups,
+        })
+
+@dataclass
+class SolverConfig:
+    """
+    Tunable settings shared by every caller of solve_cover.
+    max_time: time budget in seconds for the search.
+    num_workers: CP-SAT search workers and coverage build processes,
+    None uses every CPU.
+    strategy: "exact" (greedy hint + CP-SAT over every k-group), "greedy"
+    (greedy cover only, over a heuristic pool when the full model is too
+    large), "heuristic" (CP-SAT over a growing pool of
+    k-groups, see solve_cover_heuristic) or "auto" (exact when the full
+    model is small enough, heuristic otherwise).
+    symmetry_breaking: fix canonical first/second groups (see canonical_groups).
+    memory_limit: ceiling in bytes for the coverage matrix.
+    pool_size: maximum number of k-groups in the heuristic pool.
+    local_search_time: seconds of max_time (at most a quarter of it) kept
+    back for improve_cover on covers that are not proven optimal.
+    use_library: answer from the precomputed covering-design library
+    (design_library.py) when it has an entry, without solving.
+    """
+    max_time: float = 60
+    num_workers: Optional[int] = None
+    strategy: str = "auto"
+    symmetry_breaking: bool = True
+    memory_limit: Optional[int] = DEFAULT_MEMORY_LIMIT
+    pool_size: int = 20000
+    local_search_time: float = 5
+    use_library: bool = True
+
+# Above this many (group, j-subset) pairs the full CP-SAT model is too large
+# to be useful and the "auto" strategy switches to the heuristic pool.
+EXACT_MAX_NONZEROS = 20_000_000
+
+def validate_parameters(m, n, k, j, s, samples=None):
+    """
+    Same limits as the GUI, for the headless front ends. samples, when
+    given, must be n distinct values between 1 and m.
+    Returns a list of error messages, empty if valid.
+    """
+    errors = []
+    if not (45 <= m <= 54):
+        errors.append("m must be between 45 and 54")
+    if not (7 <= n <= 25):
+        errors.append("n must be between 7 and 25")
+    if not (4 <= k <= 7):
+        errors.append("k must be between 4 and 7")
+    if not (s <= j <= k):
+        errors.append(f"j must be between s ({s}) and k ({k})")
+    if not (3 <= s <= j):
+        errors.append(f"s must be between 3 and j ({j})")
+    if samples is not None and (len(samples) != n or len(set(samples)) != n
+                                or not all(1 <= x <= m for x in samples)):
+        errors.append(f"samples must be {n} distinct values between 1 and m ({m})")
+    return errors
+
+def remap_groups(groups, samples):
+    """
+    Map index-level groups onto actual sample values.
+    """
+    return [tuple(samples[idx] for idx in grp) for grp in groups]
+
+def _use_heuristic(n, k, j, s, config):
+    if config.strategy in ("exact", "heuristic"):
+        return config.strategy == "heuristic"
+    # "auto" and "greedy" only build every k-group when that is affordable
+    num_groups = math.comb(n, k)
+    if num_groups * coverage_per_group(n, k, j, s) > EXACT_MAX_NONZEROS:
+        return True
+    return (config.memory_limit is not None
+            and estimate_coverage_bytes(n, num_groups, j, s, k) > config.memory_limit)
+
+def _solve_model(n, k_groups, coverage, config, deadline, hint, bound,
+                 symmetry_breaking=False, progress_callback=None, cancel_token=None):
+    """
+    Build and solve the CP-SAT cover model over k_groups with hint as
+    incumbent (also an upper bound) and bound as lower bound, stopping at
+    the time.time() value deadline (model building included).
+    Returns (groups, status name, best objective bound); groups is None
+    when no solution was found.
+    """
     model = cp_model.CpModel()
     x_vars = [model.NewBoolVar(f'x{i}') for i in range(len(k_groups))]
 
     # Cover constraints
-    for j_idx in range(len(j_subsets)):
-        cov_list = [x for x, covs in zip(x_vars, group_cov) if j_idx in covs]
+    for j_idx in range(coverage.num_subsets):
+        if j_idx % 4096 == 0 and time.time() >= deadline:
+            return None, "UNKNOWN", bound
+        cov_list = [x_vars[g] for g in coverage.covering(j_idx)]
         if cov_list:
             model.AddBoolOr(cov_list)
 
+    if symmetry_breaking:
+        _add_symmetry_breaking(model, x_vars, n, k_groups, coverage)
+
+    hint = set(hint)
+    for var, grp in zip(x_vars, k_groups):
+        model.AddHint(var, grp in hint)
+    num_selected = sum(x_vars)
+    model.Add(num_selected <= len(hint))
+    model.Add(num_selected >= bound)
+
     # Objective: minimize number of groups
-    model.Minimize(sum(x_vars))
+    model.Minimize(num_selected)
 
     # Solve
+    time_limit = deadline - time.time()
+    if time_limit <= 0:
+        return None, "UNKNOWN", bound
     solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = max_time
-    solver.parameters.num_search_workers = multiprocessing.cpu_count()
-    status = solver.Solve(model)
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_search_workers = config.num_workers or multiprocessing.cpu_count()
+    if cancel_token is not None:
+        cancel_token.attach(solver)
+    try:
+        if progress_callback is not None:
+            status = solver.Solve(model, IncumbentCallback(x_vars, k_groups, progress_callback, bound))
+        else:
+            status = solver.Solve(model)
+    finally:
+        if cancel_token is not None:
+            cancel_token.detach(solver)
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, solver.StatusName(status), bound
+    groups = [grp for var, grp in zip(x_vars, k_groups) if solver.Value(var)]
+    return groups, solver.StatusName(status), math.ceil(solver.BestObjectiveBound() - 1e-6)
+
+def _group_neighbors(group, n, count):
+    # groups differing from group in one element
+    outside = [x for x in range(n) if x not in group]
+    neighbors = []
+    for _ in range(count):
+        swapped = set(group)
+        swapped.remove(random.choice(group))
+        swapped.add(random.choice(outside))
+        neighbors.append(tuple(sorted(swapped)))
+    return neighbors
+
+def _repair_pool(n, k, j, s, pool, coverage):
+    """
+    Add groups to pool until every j-subset is covered: each still
+    uncovered j-subset J gets a group made of s of its elements plus
+    random others.
+    """
+    covered = np.zeros(coverage.num_subsets, dtype=bool)
+    covered[coverage.group_subsets] = True
+    subsets = None
+    added = []
+    for rank in np.flatnonzero(~covered):
+        if covered[rank]:
+            continue
+        if subsets is None:
+            subsets = colex_combinations(n, j)
+        subset = subsets[rank]
+        chosen = set(random.sample(subset, min(k, j)))
+        chosen.update(random.sample([x for x in range(n) if x not in chosen], k - len(chosen)))
+        group = tuple(sorted(chosen))
+        added.append(group)
+        pool.add(group)
+        covered[build_coverage(n, [group], j, s, memory_limit=None).group_subsets] = True
+    return added
 
-    # Extract solution
-    result = []
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        for var, grp in zip(x_vars, k_groups):
-            if solver.Value(var):
-                result.append(tuple(samples[idx] for idx in grp))
+def solve_cover_heuristic(n, k, j, s, config=None, progress_callback=None, cancel_token=None,
+                          deadline=None):
+    """
+    Large-n mode that never materializes all C(n, k) k-groups: an
+    iterative pool-grow-and-resolve loop (with strategy "greedy" only the
+    greedy cover of the first pool). The pool starts from
+    generate_coverage_k_groups, is repaired so every j-subset is covered,
+    and is solved with CP-SAT in time slices; after each round it grows
+    with one-element neighbors of the incumbent and fresh diverse groups.
+    Pool size is capped by config.pool_size, config.memory_limit and
+    EXACT_MAX_NONZEROS coverage entries; the first pool is a multiple of
+    the lower bound or a quarter of that many entries, whichever is
+    larger, and is generated within a quarter of max_time.
+    deadline: time.time() value to stop at, defaults to max_time from now.
+    Returns the same dict as solve_cover.
+    """
+    config = config or SolverConfig(strategy="heuristic")
+    start_time = time.time()
+    deadline = start_time + config.max_time if deadline is None else deadline
+    bound = lower_bound(n, k, j, s)
+    per_group = coverage_per_group(n, k, j, s)
+    # every round rebuilds the pool's coverage, so keep it near the size
+    # of the exact model, though always a few times the expected cover
+    max_pool = min(config.pool_size, math.comb(n, k),
+                   max(8 * bound, EXACT_MAX_NONZEROS // max(1, per_group)))
+    if config.memory_limit is not None:
+        max_pool = min(max_pool, max(1, int(config.memory_limit // max(1, 16 * per_group))))
+
+    if max_pool >= math.comb(n, k):
+        pool = set(itertools.combinations(range(n), k))
+    else:
+        initial = min(max_pool // 2, max(8 * bound, EXACT_MAX_NONZEROS // 4 // max(1, per_group)))
+        pool = set(generate_coverage_k_groups(n, k, j, s, max(1, initial),
+                                              deadline=start_time + config.max_time / 4))
+    incumbent = None
+
+    # Only forward incumbents that improve on the pool's best so far
+    def report(info):
+        if progress_callback is not None and len(info['groups']) < len(incumbent):
+            progress_callback(dict(info, wall_time=time.time() - start_time))
+
+    stale_rounds = 0
+    def finished():
+        return (len(incumbent) <= bound or time.time() >= deadline
+                or (cancel_token is not None and cancel_token.cancelled))
+
+    while True:
+        k_groups = sorted(pool)
+        coverage = build_coverage(n, k_groups, j, s, memory_limit=config.memory_limit,
+                                  workers=config.num_workers)
+        if _repair_pool(n, k, j, s, pool, coverage):
+            k_groups = sorted(pool)
+            coverage = build_coverage(n, k_groups, j, s, memory_limit=config.memory_limit,
+                                  workers=config.num_workers)
+        if incumbent is None:
+            incumbent = [k_groups[g] for g in greedy_cover(coverage)]
+            if progress_callback is not None:
+                progress_callback({'objective': len(incumbent), 'bound': bound,
+                                   'wall_time': time.time() - start_time, 'groups': incumbent})
+        if finished() or config.strategy == "greedy":
+            break
 
+        # A complete pool gets the whole remaining budget in one solve
+        complete = len(pool) == math.comb(n, k)
+        remaining = deadline - time.time()
+        time_slice = remaining if complete else min(remaining, max(5.0, config.max_time / 4))
+        groups, _, _ = _solve_model(n, k_groups, coverage, config, time.time() + time_slice, incumbent, bound,
+                                    progress_callback=report, cancel_token=cancel_token)
+        if groups is not None and len(groups) < len(incumbent):
+            incumbent = groups
+            stale_rounds = 0
+        else:
+            stale_rounds += 1
+        if complete or finished():
+            break
+
+        # Grow the pool around the incumbent, evicting unused groups at the cap
+        fresh = set(incumbent)
+        for group in incumbent:
+            fresh.update(_group_neighbors(group, n, 4))
+        extra = min(max(1, max_pool // 10) * (1 + stale_rounds), math.comb(n, k))
+        fresh.update(generate_diverse_k_groups(n, k, extra))
+        pool |= fresh
+        if len(pool) > max_pool:
+            keep = set(incumbent)
+            rest = list(pool - keep)
+            pool = keep | set(random.sample(rest, max(0, max_pool - len(keep))))
+
+    if len(incumbent) <= bound:
+        return _cover_result(incumbent, "OPTIMAL", len(incumbent))
+    return _cover_result(incumbent, "GREEDY" if config.strategy == "greedy" else "FEASIBLE", bound)
+
+def solve_cover(n, k, j, s, config=None, progress_callback=None, cancel_token=None):
+    """
+    Index-level greedy + CP-SAT cover: the answer only depends on (n, k, j, s).
+    A lazy greedy cover is computed first and given to CP-SAT as a solution
+    hint and as an upper bound on the number of groups.
+    The combinatorial lower_bound is added as a constraint so the search
+    stops as soon as an incumbent reaches it. Covers that are not proven
+    optimal are then shrunk with improve_cover in the local_search_time
+    kept back from max_time. Every stage works towards one deadline, so
+    the call only overruns max_time by the coverage build and greedy
+    cover, which always run.
+    Returns a dict with the chosen groups (tuples of indices into range(n)),
+    the status name ("GREEDY" if CP-SAT found nothing better in time),
+    whether the cover is proven optimal, the best known lower bound and the
+    gap between the two.
+    Instances stored in the covering-design library are answered from it
+    directly unless config.use_library is off.
+    config: SolverConfig, defaults to SolverConfig().
+    progress_callback: called with {'objective', 'bound', 'wall_time',
+    'groups'} for the greedy cover and every improved CP-SAT incumbent.
+    cancel_token: CancellationToken; once cancelled the search stops and
+    the best cover found so far is returned.
+    """
+    config = config or SolverConfig()
+    if config.strategy not in ("auto", "exact", "greedy", "heuristic"):
+        raise ValueError(f"Unknown strategy: {config.strategy}")
+    start_time = time.time()
+    if progress_callback is not None:
+        # wall_time counts from this call whichever stage reports, so it
+        # keeps increasing across greedy, CP-SAT and local search
+        report = progress_callback
+        def progress_callback(info):
+            report(dict(info, wall_time=time.time() - start_time))
+    if config.use_library:
+        stored = get_default_library().lookup(n, k, j, s)
+        if stored is not None:
+            bound = len(stored['groups']) if stored['optimal'] else lower_bound(n, k, j, s)
+            return _cover_result(stored['groups'], "OPTIMAL" if stored['optimal'] else "FEASIBLE", bound)
+
+    # One deadline for the whole call; local search time comes out of
+    # max_time, not on top of it
+    deadline = start_time + config.max_time
+    reserve = 0
+    if config.strategy != "greedy" and config.max_time > 0:
+        reserve = min(max(0, config.local_search_time), config.max_time / 4)
+    search_config = replace(config, max_time=config.max_time - reserve)
+    if _use_heuristic(n, k, j, s, config):
+        result = solve_cover_heuristic(n, k, j, s, search_config, progress_callback, cancel_token,
+                                       deadline - reserve)
+    else:
+        result = _solve_cover_exact(n, k, j, s, search_config, progress_callback, cancel_token,
+                                    deadline - reserve)
+
+    # Try to shrink covers that are not proven optimal
+    remaining = min(config.local_search_time, deadline - time.time())
+    if (not result['optimal'] and result['groups'] and config.strategy != "greedy"
+            and remaining > 0 and not (cancel_token is not None and cancel_token.cancelled)):
+        improved = improve_cover(n, k, j, s, result['groups'], remaining,
+                                 progress_callback, cancel_token, start_time)
+        if len(improved['groups']) < len(result['groups']):
+            improved['lower_bound'] = max(improved['lower_bound'], result['lower_bound'])
+            improved['gap'] = len(improved['groups']) - improved['lower_bound']
+            result = improved
+    return result
+
+def _cached_result(n, k, j, s, cached):
+    # a solution_cache entry (DatabaseManager.get_cached_cover) as a result
+    groups = cached['groups']
+    if cached['optimal']:
+        result = _cover_result(groups, "OPTIMAL", len(groups))
+    else:
+        result = _cover_result(groups, "FEASIBLE", lower_bound(n, k, j, s))
+    result['cached'] = True
     return result
 
-def generate_diverse_k_groups(n, k, max_groups):
+def cached_optimum(db, n, k, j, s):
+    """
+    The proven optimal cover in db's solution cache as a solve_cover result
+    (with cached=True and computation_time 0), or None.
+    """
+    cached = db.get_cached_cover(n, k, j, s)
+    if not (cached and cached['optimal']):
+        return None
+    return dict(_cached_result(n, k, j, s, cached), computation_time=0.0)
+
+def solve_with_cache(db, n, k, j, s, config=None, progress_callback=None, cancel_token=None):
     """
-    Generate a diverse set of k-groups for better coverage.
+    solve_cover through the solution cache of db (a DatabaseManager), the
+    one path used by the GUI, the CLI, batches and the HTTP service.
+    A proven optimum in the cache is returned without solving; otherwise
+    the new cover is saved to the cache and a smaller cached cover is
+    returned instead of a worse new one.
+    Returns the solve_cover dict plus computation_time (seconds spent
+    here) and cached (whether the groups came from the cache).
     """
+    start = time.time()
+    cached = db.get_cached_cover(n, k, j, s)
+    if cached and cached['optimal']:
+        return dict(_cached_result(n, k, j, s, cached), computation_time=time.time() - start)
+
+    result = solve_cover(n, k, j, s, config, progress_callback, cancel_token)
+    result['cached'] = False
+    if result['groups']:
+        db.save_cached_cover(n, k, j, s, result['groups'], result['optimal'], time.time() - start)
+    # Keep the cached cover if this run did not beat it
+    if cached and (not result['groups'] or len(cached['groups']) < len(result['groups'])):
+        groups = cached['groups']
+        bound = result['lower_bound']
+        status = "OPTIMAL" if len(groups) <= bound else "FEASIBLE"
+        result = dict(_cover_result(groups, status, len(groups) if status == "OPTIMAL" else bound),
+                      cached=True)
+    result['computation_time'] = time.time() - start
+    return result
+
+def _solve_cover_exact(n, k, j, s, config, progress_callback=None, cancel_token=None, deadline=None):
+    start_time = time.time()
+    deadline = start_time + config.max_time if deadline is None else deadline
+
+    # Generate k-groups; j-subsets are identified by their colex rank
+    k_groups = list(itertools.combinations(range(n), k))
+
+    # Compute coverage for each k-group and the j-subset -> groups index.
+    # All groups cover the same number of j-subsets, so none is filtered.
+    coverage = build_coverage(n, k_groups, j, s, memory_limit=config.memory_limit,
+                              workers=config.num_workers)
+
+    # Greedy incumbent, relabelled to satisfy the symmetry breaking
+    greedy = [k_groups[g] for g in greedy_cover(coverage)]
+    if config.symmetry_breaking:
+        greedy = canonicalize_cover(greedy, n)
+    bound = lower_bound(n, k, j, s)
+    if progress_callback is not None:
+        progress_callback({'objective': len(greedy), 'bound': bound,
+                           'wall_time': time.time() - start_time, 'groups': greedy})
+    if len(greedy) <= bound:
+        return _cover_result(greedy, "OPTIMAL", len(greedy))
+    # CP-SAT only gets what coverage and greedy left of the budget
+    if (config.strategy == "greedy" or config.max_time <= 0 or time.time() >= deadline
+            or (cancel_token is not None and cancel_token.cancelled)):
+        return _cover_result(greedy, "GREEDY", bound)
+
+    symmetry_breaking = config.symmetry_breaking and bool(k_groups)
+    groups, status, solver_bound = _solve_model(n, k_groups, coverage, config, deadline, greedy, bound,
+                                                symmetry_breaking, progress_callback, cancel_token)
+
+    # Extract solution, falling back to the greedy cover
+    if groups is None:
+        return _cover_result(greedy, "GREEDY", bound)
+    if status == "OPTIMAL":
+        return _cover_result(groups, "OPTIMAL", len(groups))
+    return _cover_result(groups, "FEASIBLE", max(bound, solver_bound))
+
+class _CoverState:
+    """
+    Mutable cover for local search: per j-subset cover counts plus the set
+    of uncovered colex ranks, updated incrementally as groups change.
+    """
+    def __init__(self, n, k, j, s, groups):
+        self.n, self.j = n, j
+        self.template = _coverage_template(n, k, j, s)
+        self.binom = _binomial_table(n, j)
+        self.column = np.arange(1, j + 1)
+        self.counts = np.zeros(math.comb(n, j), dtype=np.int32)
+        self.groups = []
+        self.ranks = []
+        self.uncovered = set(range(len(self.counts)))
+        for group in groups:
+            self.add(group)
+
+    def group_ranks(self, group):
+        """Colex ranks of the j-subsets covered by a single group."""
+        member = np.zeros(self.n, dtype=bool)
+        member[list(group)] = True
+        order = np.argsort(~member, kind='stable')
+        return self.binom[np.sort(order[self.template], axis=-1), self.column].sum(axis=-1)
+
+    def add(self, group, ranks=None):
+        ranks = self.group_ranks(group) if ranks is None else ranks
+        self.counts[ranks] += 1
+        self.uncovered.difference_update(ranks[self.counts[ranks] == 1].tolist())
+        self.groups.append(group)
+        self.ranks.append(ranks)
+
+    def remove(self, idx):
+        ranks = self.ranks[idx]
+        self.counts[ranks] -= 1
+        self.uncovered.update(ranks[self.counts[ranks] == 0].tolist())
+        self.groups[idx] = self.groups[-1]
+        self.ranks[idx] = self.ranks[-1]
+        self.groups.pop()
+        self.ranks.pop()
+
+    def unique_coverage(self, idx):
+        """Number of j-subsets covered by this group only."""
+        return int(np.count_nonzero(self.counts[self.ranks[idx]] == 1))
+
+    def drop_redundant(self):
+        """Remove groups whose every j-subset is also covered elsewhere."""
+        idx = 0
+        while idx < len(self.groups):
+            if self.unique_coverage(idx) == 0:
+                self.remove(idx)
+            else:
+                idx += 1
+
+def _try_two_for_one(state, deadline):
+    """
+    2-for-1 move: for pairs of groups, drop both and add the group made of
+    the k elements most frequent among the j-subsets left uncovered.
+    Returns True if the cover shrank.
+    """
+    k = len(state.groups[0])
+    order = sorted(range(len(state.groups)), key=state.unique_coverage)
+    for a_pos, a in enumerate(order):
+        for b in order[a_pos + 1:]:
+            if time.time() >= deadline:
+                return False
+            group_a, group_b = state.groups[a], state.groups[b]
+            ranks_a, ranks_b = state.ranks[a], state.ranks[b]
+            state.counts[ranks_a] -= 1
+            state.counts[ranks_b] -= 1
+            lost = np.union1d(ranks_a[state.counts[ranks_a] == 0], ranks_b[state.counts[ranks_b] == 0])
+            state.counts[ranks_a] += 1
+            state.counts[ranks_b] += 1
+            freq = np.zeros(state.n, dtype=np.int64)
+            for rank in lost.tolist():
+                freq[list(colex_unrank(rank, state.j))] += 1
+            candidate = tuple(sorted(np.argsort(-freq, kind='stable')[:k].tolist()))
+            cand_ranks = state.group_ranks(candidate)
+            if np.isin(lost, cand_ranks).all():
+                for idx in sorted((a, b), reverse=True):
+                    state.remove(idx)
+                state.add(candidate, cand_ranks)
+                return True
+    return False
+
+def _anneal(state, deadline, max_steps, cancel_token=None, temperature=1.0, cooling=0.999):
+    """
+    Simulated annealing over one-element swaps until no j-subset is
+    uncovered. Each move picks an uncovered j-subset J and a group, and
+    swaps a group element outside J for an element of J, which raises the
+    group's overlap with J. Returns True if the state became a cover.
+    """
+    for _ in range(max_steps):
+        if not state.uncovered:
+            return True
+        if time.time() >= deadline or (cancel_token is not None and cancel_token.cancelled):
+            return False
+        target = colex_unrank(random.choice(tuple(state.uncovered)), state.j)
+        idx = random.randrange(len(state.groups))
+        group = state.groups[idx]
+        incoming = [x for x in target if x not in group]
+        outgoing = [x for x in group if x not in target]
+        if not incoming or not outgoing:
+            continue
+        new_group = set(group)
+        new_group.remove(random.choice(outgoing))
+        new_group.add(random.choice(incoming))
+        new_group = tuple(sorted(new_group))
+
+        before = len(state.uncovered)
+        old_ranks = state.ranks[idx]
+        state.remove(idx)
+        state.add(new_group)
+        delta = len(state.uncovered) - before
+        if delta > 0 and random.random() >= math.exp(-delta / temperature):
+            # reject: undo the swap
+            state.remove(len(state.groups) - 1)
+            state.add(group, old_ranks)
+        temperature = max(0.05, temperature * cooling)
+    return not state.uncovered
+
+def improve_cover(n, k, j, s, groups, max_time=10, progress_callback=None, cancel_token=None,
+                  start_time=None):
+    """
+    Local-search improver for an existing index-level cover (for instance a
+    FEASIBLE result of solve_cover or one loaded from the database):
+    redundancy elimination, 2-for-1 moves, then repeatedly drop the group
+    covering the fewest j-subsets on its own and repair the cover with
+    simulated annealing over one-element swaps, within max_time seconds.
+    start_time: origin of the reported wall_time, defaults to now (solve_cover
+    passes its own so progress keeps counting up).
+    Returns the same dict as solve_cover.
+    """
+    started = time.time()
+    start_time = started if start_time is None else start_time
+    deadline = started + max_time
+    bound = lower_bound(n, k, j, s)
+    if any(len(set(grp)) != k for grp in groups):
+        raise ValueError(f"Groups must have {k} distinct elements")
+    state = _CoverState(n, k, j, s, [tuple(sorted(grp)) for grp in groups])
+    if state.uncovered:
+        raise ValueError("Groups do not cover every j-subset")
+    state.drop_redundant()
+    while len(state.groups) > 2 and _try_two_for_one(state, started + max_time / 4):
+        state.drop_redundant()
+    best = list(state.groups)
+
+    def report():
+        if progress_callback is not None:
+            progress_callback({'objective': len(best), 'bound': bound,
+                               'wall_time': time.time() - start_time, 'groups': best})
+
+    report()
+    while len(best) > bound and time.time() < deadline:
+        if cancel_token is not None and cancel_token.cancelled:
+            break
+        weakest = min(range(len(state.groups)), key=state.unique_coverage)
+        state.remove(weakest)
+        if _anneal(state, deadline, max_steps=20000, cancel_token=cancel_token):
+            state.drop_redundant()
+            best = list(state.groups)
+            report()
+        else:
+            # restart from the best cover and try again with fresh randomness
+            state = _CoverState(n, k, j, s, best)
+
+    status = "OPTIMAL" if len(best) <= bound else "FEASIBLE"
+    return _cover_result(sorted(best), status, len(best) if status == "OPTIMAL" else bound)
+
+def improve_optimized_samples(selected_samples, groups, k, j, s, max_time=10):
+    """
+    improve_cover for groups given as sample values, e.g. a stored result.
+    """
+    position = {sample: idx for idx, sample in enumerate(selected_samples)}
+    if any(x not in position for grp in groups for x in grp):
+        raise ValueError("Groups contain values that are not among the selected samples")
+    index_groups = [tuple(position[x] for x in grp) for grp in groups]
+    result = improve_cover(len(selected_samples), k, j, s, index_groups, max_time)
+    return remap_groups(result['groups'], selected_samples)
+
+def compute_optimized_samples(selected_samples, k, j, s, max_time=60, config=None,
+                              progress_callback=None, cancel_token=None):
+    """
+    Hybrid greedy hint + CP-SAT for exact set cover with upper bound.
+    selected_samples: list of sample values.
+    config: SolverConfig, overrides max_time when given.
+    progress_callback: see solve_cover, groups are given as sample values.
+    """
+    config = config or SolverConfig(max_time=max_time)
+    callback = None
+    if progress_callback is not None:
+        def callback(info):
+            progress_callback(dict(info, groups=remap_groups(info['groups'], selected_samples)))
+    result = solve_cover(len(selected_samples), k, j, s, config, callback, cancel_token)
+    return remap_groups(result['groups'], selected_samples)
+
+def colex_unrank_array(ranks, n, r):
+    """
+    Vectorized colex_unrank: one sorted r-subset of range(n) per rank,
+    returned as an int64 array of shape (len(ranks), r).
+    """
+    binom = _binomial_table(n, r)
+    remaining = np.asarray(ranks, dtype=np.int64).copy()
+    subsets = np.empty((len(remaining), r), dtype=np.int64)
+    for i in range(r, 0, -1):
+        # C(a, i) is non-decreasing in a: largest a with C(a, i) <= rank
+        column = binom[:, i]
+        top = np.searchsorted(column, remaining, side='right') - 1
+        subsets[:, i - 1] = top
+        remaining -= column[top]
+    return subsets
+
+def _sample_k_groups_by_rank(n, k, count, seen):
+    """
+    Draw count distinct k-groups not in seen by sampling colex ranks
+    uniformly without replacement.
+    """
+    total = math.comb(n, k)
+    groups = []
+    while len(groups) < count and len(seen) < total:
+        want = min(total, count - len(groups) + len(seen))
+        ranks = random.sample(range(total), want)
+        for group in map(tuple, colex_unrank_array(ranks, n, k).tolist()):
+            if group not in seen:
+                seen.add(group)
+                groups.append(group)
+                if len(groups) == count:
+                    break
+    return groups
+
+def generate_diverse_k_groups(n, k, max_groups, method="strategies"):
+    """
+    Generate a diverse set of distinct k-groups for better coverage.
+    At most C(n, k) groups are returned. method="strategies" mixes the
+    core/spaced/clusters/random constructions, method="rank" samples
+    groups directly by random colex rank. Duplicates are rejected with a
+    hash set, and when the strategies keep producing known groups the rest
+    is filled by rank sampling, so generation always terminates.
+    """
+    total = math.comb(n, k)
+    max_groups = min(max_groups, total)
+    if max_groups == total:
+        return list(itertools.combinations(range(n), k))
+    seen = set()
+    if method == "rank":
+        return _sample_k_groups_by_rank(n, k, max_groups, seen)
+    if method != "strategies":
+        raise ValueError(f"Unknown generation method: {method}")
+
     all_indices = list(range(n))
     k_groups = []
 
+    def add(group):
+        if group not in seen:
+            seen.add(group)
+            k_groups.append(group)
+            return True
+        return False
+
     # Initial random groups
     initial = min(max_groups // 4, 100)
     for _ in range(initial):
-        k_groups.append(tuple(sorted(random.sample(all_indices, k))))
+        add(tuple(sorted(random.sample(all_indices, k))))
 
-    strategies = ["core", "spaced", "clusters", "random"]
+    # core/spaced/clusters take turns for three quarters of the pool,
+    # plain random groups make up the rest
+    strategies = ["core", "spaced", "clusters"]
+    misses = dict.fromkeys(strategies, 0)
+    structured = max_groups - max_groups // 4
     idx = 0
-    while len(k_groups) < max_groups:
+    while len(k_groups) < structured and strategies:
         strat = strategies[idx % len(strategies)]
         idx += 1
-
         if strat == "core":
-            core_size = min(k - 1, 3)
-            core = random.sample(all_indices, core_size)
-            remaining = [i for i in all_indices if i not in core]
-            rest = random.sample(remaining, k - core_size)
-            new_group = tuple(sorted(core + rest))
+            # a random core plus random distinct extras is one uniform draw
+            new_group = tuple(sorted(random.sample(all_indices, k)))
         elif strat == "spaced":
             step = max(1, n // k)
             start = random.randint(0, n - 1)
             new_group = tuple(sorted((start + i * step) % n for i in range(k)))
-        elif strat == "clusters":
+        else:
             center = random.randint(0, n - 1)
             window = min(n, k * 2)
             region = [(center + i) % n for i in range(-window // 2, window // 2)]
@@ -90,10 +1158,78 @@ def generate_diverse_k_groups(n, k, max_groups):
                 new_group = tuple(sorted(random.sample(region, k)))
             else:
                 new_group = tuple(sorted(random.sample(all_indices, k)))
+
+        if add(new_group):
+            misses[strat] = 0
         else:
-            new_group = tuple(sorted(random.sample(all_indices, k)))
+            misses[strat] += 1
+            if misses[strat] > 50:
+                # this construction is saturated (spaced only has n groups)
+                strategies.remove(strat)
 
-        if new_group not in k_groups:
-            k_groups.append(new_group)
+    # the random quarter, plus whatever the saturated strategies left over
+    k_groups.extend(_sample_k_groups_by_rank(n, k, max_groups - len(k_groups), seen))
+    return k_groups
+
+def generate_coverage_k_groups(n, k, j, s, max_groups, candidates=8, deadline=None):
+    """
+    Coverage-aware pool generation. Uncovered j-subsets are tracked in a
+    bitset over their colex ranks and visited in random order; each still
+    uncovered J is padded to a k-group (random elements from J when k < j)
+    and the candidate covering the most uncovered j-subsets is kept. Once
+    everything is covered a new layer starts from an empty bitset, so the
+    pool consists of several different greedy-like covers.
+    candidates is reduced so one pick ranks at most CANDIDATE_CELLS cells.
+    deadline: time.time() value after which the rest of the pool is filled
+    by plain rank sampling.
+    Returns at most min(max_groups, C(n, k)) distinct k-groups.
+    """
+    total = math.comb(n, k)
+    max_groups = min(max_groups, total)
+    if max_groups == total:
+        return list(itertools.combinations(range(n), k))
+
+    num_subsets = math.comb(n, j)
+    template = _coverage_template(n, k, j, s)
+    binom = _binomial_table(n, j)
+    candidates = max(1, min(candidates, CANDIDATE_CELLS // template.size))
+    uncovered = np.ones(num_subsets, dtype=bool)
+    order = np.random.permutation(num_subsets)
+    pos = 0
+    seen = set()
+    k_groups = []
+    misses = 0
+    while len(k_groups) < max_groups and misses <= 50:
+        if deadline is not None and time.time() >= deadline:
+            break
+        # next uncovered j-subset; start a new layer once all are covered
+        while pos < num_subsets and not uncovered[order[pos]]:
+            pos += 1
+        if pos == num_subsets:
+            if uncovered.all():
+                break
+            uncovered[:] = True
+            order = np.random.permutation(num_subsets)
+            pos = 0
+            continue
+        subset = colex_unrank(int(order[pos]), j)
+        base = list(subset) if k >= j else random.sample(subset, k)
+        outside = [x for x in range(n) if x not in subset]
+        options = {tuple(sorted(base + random.sample(outside, k - len(base))))
+                   for _ in range(candidates)} - seen
+        if not options:
+            # every padding tried is already in the pool, move on
+            misses += 1
+            pos += 1
+            continue
+        misses = 0
+        options = sorted(options)
+        ranks = _rank_coverage(n, np.array(options, dtype=np.int64), template, binom)
+        best = int(np.argmax(uncovered[ranks].sum(axis=1)))
+        uncovered[ranks[best]] = False
+        seen.add(options[best])
+        k_groups.append(options[best])
 
+    # saturated or out of time: fill the rest uniformly
+    k_groups.extend(_sample_k_groups_by_rank(n, k, max_groups - len(k_groups), seen))
     return k_groups
@@ -0,0 +1,118 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+from algorithm import SolverConfig, cached_optimum, process_context, remap_groups, solve_cover, solve_with_cache
+from database import DatabaseManager
+
+@dataclass
+class BatchJob:
+    """
+    One request: cover the j-subsets of samples with k-groups sharing at
+    least s samples. max_time is the job's solver budget in seconds,
+    job_id and m are carried through to the result untouched.
+    """
+    samples: list
+    k: int
+    j: int
+    s: int
+    max_time: float = 60
+    job_id: Optional[object] = None
+    m: Optional[int] = None
+
+    @property
+    def key(self):
+        return len(self.samples), self.k, self.j, self.s
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of a BatchJob. groups are tuples of sample values; error is
+    set (and groups empty) if solving its instance raised.
+    """
+    job: BatchJob
+    groups: list = field(default_factory=list)
+    optimal: bool = False
+    status: str = ""
+    lower_bound: int = 0
+    computation_time: float = 0.0
+    cached: bool = False
+    error: Optional[str] = None
+
+def solve_instance(n, k, j, s, config, db_path=None):
+    """
+    Process pool task: solve_with_cache for one (n, k, j, s) at index level
+    against the database at db_path, or plain solve_cover with the wall
+    time added as computation_time when there is none.
+    """
+    if db_path is not None:
+        db = DatabaseManager(db_path)
+        try:
+            return solve_with_cache(db, n, k, j, s, config)
+        finally:
+            db.close()
+    start = time.time()
+    result = solve_cover(n, k, j, s, config)
+    result['computation_time'] = time.time() - start
+    result['cached'] = False
+    return result
+
+def _job_results(jobs, result):
+    for job in jobs:
+        yield BatchResult(job, remap_groups(result['groups'], job.samples), result['optimal'],
+                          result['status'], result['lower_bound'], result['computation_time'],
+                          result['cached'])
+
+def solve_batch(jobs, max_workers=None, config=None, db=None):
+    """
+    Solve many jobs and yield a BatchResult for each as soon as its
+    instance is done (completion order, not input order).
+    The cover only depends on (n, k, j, s), so jobs are grouped by that key
+    and each instance is solved once, with the largest max_time of its
+    jobs, then remapped onto every job's samples. Instances run on a
+    process pool of max_workers processes (default: every CPU), each
+    getting an equal share of the CPUs for CP-SAT.
+    jobs: iterable of BatchJob or dicts with BatchJob fields.
+    config: SolverConfig template; max_time is overridden per instance.
+    db: optional DatabaseManager; instances then go through
+    solve_with_cache on its file, like the GUI and CLI: proven optima are
+    answered without solving, new covers are saved and a smaller cached
+    cover beats a worse new one.
+    """
+    config = config or SolverConfig()
+    max_workers = max_workers or multiprocessing.cpu_count()
+    by_key = {}
+    for job in jobs:
+        job = job if isinstance(job, BatchJob) else BatchJob(**job)
+        by_key.setdefault(job.key, []).append(job)
+
+    pending = {}
+    for key, key_jobs in by_key.items():
+        cached = cached_optimum(db, *key) if db is not None else None
+        if cached is not None:
+            yield from _job_results(key_jobs, cached)
+        else:
+            pending[key] = key_jobs
+    if not pending:
+        return
+
+    db_path = db.db_path if db is not None else None
+    workers = min(max_workers, len(pending))
+    threads = config.num_workers or max(1, multiprocessing.cpu_count() // workers)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=process_context()) as pool:
+        futures = {}
+        for key, key_jobs in pending.items():
+            budget = max(job.max_time for job in key_jobs)
+            instance_config = replace(config, max_time=budget, num_workers=threads)
+            futures[pool.submit(solve_instance, *key, instance_config, db_path)] = key
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                for job in pending[key]:
+                    yield BatchResult(job, error=str(e) or type(e).__name__)
+                continue
+            yield from _job_results(pending[key], result)
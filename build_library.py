@@ -0,0 +1,76 @@
+"""
+Offline build of the covering-design library (see design_library.py).
+
+    python build_library.py --time 60
+
+Solves every (n, k, j, s) the GUI accepts and writes the best index-level
+cover for each to covering_designs.bin. An existing library is merged:
+proven optima are skipped and other entries are only replaced by smaller
+covers, so the build can be interrupted and rerun with a larger budget.
+
+The shipped covering_designs.bin holds the proven optima for n <= 12:
+
+    python build_library.py --n 7 8 9 10 11 12 --time 5 --optimal-only
+"""
+import argparse
+import time
+
+from algorithm import SolverConfig, solve_cover
+from design_library import DEFAULT_LIBRARY_PATH, DesignLibrary, write_library
+
+def library_parameters(n_values=range(7, 26), k_values=range(4, 8)):
+    """
+    Every (n, k, j, s) with s <= j <= k and s >= 3, as in validate_parameters.
+    """
+    for n in n_values:
+        for k in k_values:
+            for j in range(3, k + 1):
+                for s in range(3, j + 1):
+                    yield n, k, j, s
+
+def build_library(path=DEFAULT_LIBRARY_PATH, max_time=60, params=None, progress=print,
+                  optimal_only=False):
+    """
+    Solve every instance in params (default: library_parameters()) with a
+    max_time budget each and merge the covers into the library at path.
+    The file is rewritten after every improved entry. With optimal_only,
+    covers that are not proven optimal are left out.
+    Returns the merged entries.
+    """
+    entries = DesignLibrary(path).entries()
+    params = list(library_parameters() if params is None else params)
+    for i, (n, k, j, s) in enumerate(params, 1):
+        known = entries.get((n, k, j, s))
+        if known and known[1]:
+            continue
+        start = time.time()
+        config = SolverConfig(max_time=max_time, use_library=False)
+        result = solve_cover(n, k, j, s, config)
+        groups = result['groups']
+        if known and len(known[0]) <= len(groups):
+            status = "kept"
+        elif optimal_only and not result['optimal']:
+            status = "skipped, not proven optimal"
+        else:
+            entries[(n, k, j, s)] = (groups, result['optimal'])
+            write_library(path, entries)
+            status = "optimal" if result['optimal'] else "feasible"
+        if progress is not None:
+            best = entries[(n, k, j, s)][0] if (n, k, j, s) in entries else groups
+            progress(f"[{i}/{len(params)}] n={n} k={k} j={j} s={s}: {len(best)} groups "
+                     f"({status}, {time.time() - start:.1f}s)")
+    return entries
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the precomputed covering-design library")
+    parser.add_argument("--output", default=DEFAULT_LIBRARY_PATH, help="library file to create or update")
+    parser.add_argument("--time", type=float, default=60, help="solver budget per instance in seconds")
+    parser.add_argument("--n", type=int, nargs="+", default=list(range(7, 26)), help="n values to build")
+    parser.add_argument("--k", type=int, nargs="+", default=list(range(4, 8)), help="k values to build")
+    parser.add_argument("--optimal-only", action="store_true", help="only store proven optimal covers")
+    args = parser.parse_args(argv)
+    build_library(args.output, args.time, library_parameters(args.n, args.k),
+                  optimal_only=args.optimal_only)
+
+if __name__ == "__main__":
+    main()
@@ -1,129 +1,539 @@
 import sqlite3
 import datetime
+import queue
+import re
+import struct
+import threading
+from contextlib import contextmanager
+
+# Applied to every pooled connection. WAL lets readers run alongside the
+# writer; NORMAL sync is durable across application crashes in WAL mode.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8192",
+)
+
+# Sample values are stored as bits of a 64-bit mask
+MAX_MASK_VALUE = 63
+
+def encode_mask(values):
+    """
+    Pack distinct sample values 0..63 into one integer bitmask.
+    """
+    mask = 0
+    for x in values:
+        mask |= 1 << x
+    return mask
+
+def decode_mask(mask):
+    """
+    Sorted sample values of a bitmask.
+    """
+    return [x for x in range(mask.bit_length()) if mask >> x & 1]
+
+def encode_groups(groups):
+    """
+    All of a result's groups as one BLOB of little-endian uint64 bitmasks,
+    in group order.
+    """
+    return struct.pack(f"<{len(groups)}Q", *(encode_mask(grp) for grp in groups))
+
+def decode_groups(blob):
+    return [decode_mask(mask) for mask in struct.unpack(f"<{len(blob) // 8}Q", blob)]
+
+def _compactable(samples):
+    return all(0 <= x <= MAX_MASK_VALUE for x in samples)
+
+RESULT_COLUMNS = "id, m, n, k, j, s, num_results, timestamp, computation_time"
+PARAMETERS = ("m", "n", "k", "j", "s")
+
+_FILTER_RE = re.compile(r"^(m|n|k|j|s)\s*(<=|>=|=|:|<|>)\s*(\d+)(?:-(\d+))?$", re.IGNORECASE)
+_DATE_RE = re.compile(r"^(since|until|after|before)?:?(\d{4}(?:-\d{2}(?:-\d{2})?)?)$", re.IGNORECASE)
+
+# Largest value any of m, n, k, j, s can take; longer numbers in a search
+# are run ID fragments, not parameter values
+MAX_PARAMETER_VALUE = 54
+
+def _prefix_end(prefix):
+    # smallest string above every string starting with prefix
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def parse_search(term):
+    """
+    Turn a search box string into query_results keyword arguments.
+    Tokens (space separated, combined with AND):
+      n=9  k:6  n=7-12  s>=4  j<6   parameter filters (m, n, k, j, s)
+      2026-10  2026-10-17           timestamp prefix
+      since:2026-01-01  until:2026-02  date bounds, both inclusive
+      after:2026-01-01  before:2026-02 date bounds, both exclusive
+      9                             any parameter equal to 9 (up to 54)
+    Anything else is free text matched against run IDs and timestamps.
+    """
+    filters = {}
+    text = []
+    for token in term.split():
+        match = _FILTER_RE.match(token)
+        if match:
+            name, op, value, upper = match.groups()
+            name, value = name.lower(), int(value)
+            lo, hi = filters.get(name, (None, None))
+            if upper is not None:
+                lo, hi = value, int(upper)
+            elif op in ("=", ":"):
+                lo, hi = value, value
+            elif op == ">=":
+                lo = value
+            elif op == ">":
+                lo = value + 1
+            elif op == "<=":
+                hi = value
+            else:
+                hi = value - 1
+            filters[name] = (lo, hi)
+            continue
+        match = _DATE_RE.match(token)
+        if match:
+            bound, date = match.groups()
+            bound = (bound or "").lower()
+            if bound == "since":
+                filters['since'] = date
+            elif bound == "after":
+                filters['since'] = _prefix_end(date)
+            elif bound == "until":
+                filters['until'] = _prefix_end(date)
+            elif bound == "before":
+                filters['until'] = date
+            else:
+                filters['since'], filters['until'] = date, _prefix_end(date)
+            continue
+        if token.isdigit() and int(token) <= MAX_PARAMETER_VALUE:
+            filters['value'] = int(token)
+        else:
+            text.append(token)
+    if text:
+        filters['text'] = " ".join(text)
+    return filters
 
 class DatabaseManager:
     """
     Manage SQLite operations for optimal samples.
+    Results are stored compactly: the samples as one bitmask integer and
+    all groups as a single BLOB on the results row (see encode_groups).
+    Rows written by older versions keep the comma-joined samples and one
+    result_groups row per group until migrate_to_compact() converts them.
+    Connections are long-lived and shared through a small thread-safe pool
+    (at most pool_size), so the GUI, solver worker threads and the solve
+    service can all use one DatabaseManager. Call close() when done.
     """
-    def __init__(self, db_path='optimal_samples.db'):
+    def __init__(self, db_path='optimal_samples.db', pool_size=4):
         self.db_path = db_path
+        # every connection to :memory: would be a separate database
+        self.pool_size = 1 if db_path == ':memory:' else pool_size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._closed = False
         self.setup_database()
 
-    def setup_database(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        # Create results table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                m INTEGER,
-                n INTEGER,
-                k INTEGER,
-                j INTEGER,
-                s INTEGER,
-                run_id TEXT,
-                num_results INTEGER,
-                samples TEXT,
-                timestamp TEXT,
-                computation_time REAL
-            )
-        ''')
-        # Create result groups table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS result_groups (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                result_id INTEGER,
-                group_num INTEGER,
-                group_samples TEXT,
-                FOREIGN KEY (result_id) REFERENCES results(id)
-            )
-        ''')
-        conn.commit()
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """
+        Borrow a pooled connection for one transaction: committed on
+        success, rolled back on error, then returned to the pool.
+        """
+        conn = self._borrow()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._release(conn)
+
+    def _borrow(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Cannot operate on a closed DatabaseManager")
+                conn = None
+                if len(self._connections) < self.pool_size:
+                    conn = self._connect()
+                    self._connections.append(conn)
+            if conn is None:
+                conn = self._idle.get()
+        if conn is None:
+            # close() left None in the queue: pass it on to the next waiter
+            self._idle.put(None)
+            raise sqlite3.ProgrammingError("Cannot operate on a closed DatabaseManager")
+        return conn
+
+    def _release(self, conn):
+        with self._lock:
+            if not self._closed:
+                self._idle.put(conn)
+                return
+            self._connections.remove(conn)
         conn.close()
 
-    def save_result(self, m, n, k, j, s, run_id, samples, computation_time, groups):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        # Insert into results
+    def close(self):
+        """
+        Close the pool: idle connections right away, connections other
+        threads still have borrowed once they are returned. Later calls
+        raise sqlite3.ProgrammingError.
+        """
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if conn is not None:
+                    self._connections.remove(conn)
+                    conn.close()
+            # wakes any thread waiting for a connection
+            self._idle.put(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def setup_database(self):
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            # Create results table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    m INTEGER,
+                    n INTEGER,
+                    k INTEGER,
+                    j INTEGER,
+                    s INTEGER,
+                    run_id TEXT,
+                    num_results INTEGER,
+                    samples TEXT,
+                    timestamp TEXT,
+                    computation_time REAL
+                )
+            ''')
+            # 为现有数据库添加 computation_time 列（若不存在）
+            try:
+                cursor.execute("ALTER TABLE results ADD COLUMN computation_time REAL")
+            except sqlite3.OperationalError:
+                pass
+            # Compact encoding columns
+            for column in ("samples_mask INTEGER", "groups_blob BLOB"):
+                try:
+                    cursor.execute(f"ALTER TABLE results ADD COLUMN {column}")
+                except sqlite3.OperationalError:
+                    pass
+            # Create result groups table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS result_groups (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    result_id INTEGER,
+                    group_num INTEGER,
+                    group_samples TEXT,
+                    FOREIGN KEY (result_id) REFERENCES results(id)
+                )
+            ''')
+            # Indexes for loading/deleting groups and for history queries
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_result_groups_result_id ON result_groups (result_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_params ON results (n, k, j, s)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results (timestamp)')
+            self.fts = self._setup_fts(cursor)
+            # Create solution cache table: index-level covers per (n, k, j, s)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS solution_cache (
+                    n INTEGER,
+                    k INTEGER,
+                    j INTEGER,
+                    s INTEGER,
+                    num_groups INTEGER,
+                    groups TEXT,
+                    optimal INTEGER,
+                    computation_time REAL,
+                    timestamp TEXT,
+                    PRIMARY KEY (n, k, j, s)
+                )
+            ''')
+
+    def _insert_result(self, cursor, m, n, k, j, s, run_id, samples, computation_time, groups):
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if _compactable(samples):
+            cursor.execute('''
+                INSERT INTO results (m, n, k, j, s, run_id, num_results, samples_mask, groups_blob,
+                                     timestamp, computation_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (m, n, k, j, s, run_id, len(groups), encode_mask(samples), encode_groups(groups),
+                  timestamp, computation_time))
+            return cursor.lastrowid
+        # Values that do not fit a 64-bit mask use the text format
         cursor.execute('''
             INSERT INTO results (m, n, k, j, s, run_id, num_results, samples, timestamp, computation_time)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            m, n, k, j, s, run_id,
-            len(groups),
-            ','.join(str(x) for x in samples),
-            datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            computation_time
-        ))
+        ''', (m, n, k, j, s, run_id, len(groups), ','.join(str(x) for x in samples),
+              timestamp, computation_time))
         result_id = cursor.lastrowid
-        # Insert groups
-        for idx, grp in enumerate(groups, 1):
-            cursor.execute('''
-                INSERT INTO result_groups (result_id, group_num, group_samples)
-                VALUES (?, ?, ?)
-            ''', (result_id, idx, ','.join(str(x) for x in grp)))
-        conn.commit()
-        conn.close()
+        # Insert groups in one executemany call
+        cursor.executemany('''
+            INSERT INTO result_groups (result_id, group_num, group_samples)
+            VALUES (?, ?, ?)
+        ''', ((result_id, idx, ','.join(str(x) for x in grp)) for idx, grp in enumerate(groups, 1)))
         return result_id
 
-    def get_all_results(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _setup_fts(self, cursor):
+        """
+        Full-text index over run IDs and timestamps, kept in sync with the
+        results table by triggers. Returns False if this SQLite build has no
+        FTS5, in which case free-text search falls back to LIKE.
+        """
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'results_fts'").fetchone()
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS results_fts
+                USING fts5(run_id, timestamp, content='results', content_rowid='id')
+            ''')
+        except sqlite3.OperationalError:
+            return False
         cursor.execute('''
-            SELECT id, m, n, k, j, s, num_results, timestamp, computation_time
-            FROM results
-            ORDER BY timestamp DESC
+            CREATE TRIGGER IF NOT EXISTS results_fts_insert AFTER INSERT ON results BEGIN
+                INSERT INTO results_fts (rowid, run_id, timestamp) VALUES (new.id, new.run_id, new.timestamp);
+            END
         ''')
-        rows = cursor.fetchall()
-        conn.close()
-        return rows
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS results_fts_delete AFTER DELETE ON results BEGIN
+                INSERT INTO results_fts (results_fts, rowid, run_id, timestamp)
+                VALUES ('delete', old.id, old.run_id, old.timestamp);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS results_fts_update AFTER UPDATE OF run_id, timestamp ON results BEGIN
+                INSERT INTO results_fts (results_fts, rowid, run_id, timestamp)
+                VALUES ('delete', old.id, old.run_id, old.timestamp);
+                INSERT INTO results_fts (rowid, run_id, timestamp) VALUES (new.id, new.run_id, new.timestamp);
+            END
+        ''')
+        if not exists:
+            # index the rows written before the FTS table existed
+            cursor.execute("INSERT INTO results_fts (results_fts) VALUES ('rebuild')")
+        return True
+
+    def save_result(self, m, n, k, j, s, run_id, samples, computation_time, groups):
+        with self._connection() as conn:
+            return self._insert_result(conn.cursor(), m, n, k, j, s, run_id, samples, computation_time, groups)
+
+    def save_results(self, results):
+        """
+        Save many results in a single transaction. results: iterable of
+        tuples with save_result's arguments in the same order.
+        Returns the new result ids in input order.
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            return [self._insert_result(cursor, *result) for result in results]
+
+    def get_all_results(self):
+        with self._connection() as conn:
+            return conn.execute(f'''
+                SELECT {RESULT_COLUMNS}
+                FROM results
+                ORDER BY timestamp DESC, id DESC
+            ''').fetchall()
+
+    def get_result_row(self, result_id):
+        """
+        The get_all_results row of one result, or None.
+        """
+        with self._connection() as conn:
+            return conn.execute(f'SELECT {RESULT_COLUMNS} FROM results WHERE id = ?',
+                                (result_id,)).fetchone()
+
+    def query_results(self, m=None, n=None, k=None, j=None, s=None, value=None,
+                      since=None, until=None, text=None, limit=None, after=None):
+        """
+        Structured history query, newest first (timestamp, then id), returning
+        the same rows as get_all_results. m, n, k, j, s: exact int or inclusive (lo, hi)
+        range with None for an open end. value: any parameter equal to it.
+        since/until: timestamp bounds as strings, since inclusive and until
+        exclusive. text: free text over run IDs and timestamps (FTS5 prefix
+        match, LIKE if FTS5 is unavailable).
+        after: (timestamp, id) of the last row of the previous page; keyset
+        pagination walks the timestamp index instead of skipping rows.
+        """
+        clauses = []
+        args = []
+        for name, spec in zip(PARAMETERS, (m, n, k, j, s)):
+            if spec is None:
+                continue
+            lo, hi = spec if isinstance(spec, (tuple, list)) else (spec, spec)
+            if lo is not None and lo == hi:
+                clauses.append(f"{name} = ?")
+                args.append(lo)
+                continue
+            if lo is not None:
+                clauses.append(f"{name} >= ?")
+                args.append(lo)
+            if hi is not None:
+                clauses.append(f"{name} <= ?")
+                args.append(hi)
+        if value is not None:
+            clauses.append("(" + " OR ".join(f"{name} = ?" for name in PARAMETERS) + ")")
+            args.extend([value] * len(PARAMETERS))
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            args.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            args.append(until)
+        if text:
+            if self.fts:
+                # every word as a quoted prefix term
+                query = " ".join('"' + word.replace('"', '""') + '"*' for word in text.split())
+                clauses.append("id IN (SELECT rowid FROM results_fts WHERE results_fts MATCH ?)")
+                args.append(query)
+            else:
+                for word in text.split():
+                    clauses.append("(run_id LIKE ? OR timestamp LIKE ?)")
+                    args.extend([f"%{word}%"] * 2)
+        if after is not None:
+            clauses.append("(timestamp, id) < (?, ?)")
+            args.extend(after)
+        sql = f"SELECT {RESULT_COLUMNS} FROM results"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        with self._connection() as conn:
+            return conn.execute(sql, args).fetchall()
 
     def search_results(self, term):
-        pattern = f"%{term}%"
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, m, n, k, j, s, num_results, timestamp, computation_time
-            FROM results
-            WHERE LOWER(timestamp) LIKE ? OR m LIKE ? OR n LIKE ? OR k LIKE ? OR j LIKE ? OR s LIKE ?
-            ORDER BY timestamp DESC
-        ''', (pattern, pattern, pattern, pattern, pattern, pattern))
-        rows = cursor.fetchall()
-        conn.close()
-        return rows
+        """
+        Search box query, see parse_search for the syntax.
+        """
+        return self.query_results(**parse_search(term))
 
     def load_result(self, result_id):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT m, n, k, j, s, samples, computation_time
-            FROM results
-            WHERE id = ?
-        ''', (result_id,))
-        row = cursor.fetchone()
-        if not row:
-            conn.close()
-            return None
-        m, n, k, j, s, samples_str, computation = row
-        # Load groups
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT m, n, k, j, s, samples, computation_time, samples_mask, groups_blob
+                FROM results
+                WHERE id = ?
+            ''', (result_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            m, n, k, j, s, samples_str, computation, samples_mask, groups_blob = row
+            if groups_blob is not None:
+                samples = decode_mask(samples_mask)
+                groups = decode_groups(groups_blob)
+            else:
+                samples = [int(x) for x in samples_str.split(',')]
+                groups = self._legacy_groups(cursor, result_id)
+        return {
+            'params': (m, n, k, j, s),
+            'samples': samples,
+            'computation_time': computation,
+            'groups': groups
+        }
+
+    def _legacy_groups(self, cursor, result_id):
+        # groups of a row in the old one-row-per-group format
         cursor.execute('''
             SELECT group_samples FROM result_groups
             WHERE result_id = ?
             ORDER BY group_num
         ''', (result_id,))
-        groups = [ [int(x) for x in r[0].split(',')] for r in cursor.fetchall() ]
-        conn.close()
+        return [ [int(x) for x in r[0].split(',')] for r in cursor.fetchall() ]
+
+    def migrate_to_compact(self, vacuum=True):
+        """
+        Convert rows stored in the old text format (comma-joined samples,
+        one result_groups row per group) to the compact encoding, in one
+        transaction. vacuum: compact the file afterwards so the freed pages
+        are returned to the file system.
+        Returns the number of converted results.
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            rows = cursor.execute(
+                'SELECT id, samples FROM results WHERE groups_blob IS NULL').fetchall()
+            updates = []
+            for result_id, samples_str in rows:
+                samples = [int(x) for x in samples_str.split(',')] if samples_str else []
+                groups = self._legacy_groups(cursor, result_id)
+                if _compactable(samples) and all(_compactable(grp) for grp in groups):
+                    updates.append((encode_mask(samples), encode_groups(groups), result_id))
+            cursor.executemany('''
+                UPDATE results SET samples_mask = ?, groups_blob = ?, samples = NULL
+                WHERE id = ?
+            ''', updates)
+            cursor.executemany('DELETE FROM result_groups WHERE result_id = ?',
+                               ((result_id,) for _, _, result_id in updates))
+        if vacuum and updates:
+            with self._connection() as conn:
+                conn.execute("VACUUM")
+        return len(updates)
+
+    def delete_result(self, result_id):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM result_groups WHERE result_id = ?', (result_id,))
+            conn.execute('DELETE FROM results WHERE id = ?', (result_id,))
+
+    def get_cached_cover(self, n, k, j, s):
+        with self._connection() as conn:
+            row = conn.execute('''
+                SELECT groups, optimal, computation_time
+                FROM solution_cache
+                WHERE n = ? AND k = ? AND j = ? AND s = ?
+            ''', (n, k, j, s)).fetchone()
+        if not row:
+            return None
+        groups_str, optimal, computation = row
         return {
-            'params': (m, n, k, j, s),
-            'samples': [int(x) for x in samples_str.split(',')],
-            'computation_time': computation,
-            'groups': groups
+            'groups': [tuple(int(x) for x in grp.split(',')) for grp in groups_str.split(';') if grp],
+            'optimal': bool(optimal),
+            'computation_time': computation
         }
 
-    def delete_result(self, result_id):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM result_groups WHERE result_id = ?', (result_id,))
-        cursor.execute('DELETE FROM results WHERE id = ?', (result_id,))
-        conn.commit()
-        conn.close()
+    def save_cached_cover(self, n, k, j, s, groups, optimal, computation_time):
+        """
+        Store an index-level cover, keeping the existing entry unless the new
+        one is smaller or proves optimality for the same size.
+        """
+        with self._connection() as conn:
+            conn.execute('''
+                INSERT INTO solution_cache (n, k, j, s, num_groups, groups, optimal, computation_time, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (n, k, j, s) DO UPDATE SET
+                    num_groups = excluded.num_groups,
+                    groups = excluded.groups,
+                    optimal = excluded.optimal,
+                    computation_time = excluded.computation_time,
+                    timestamp = excluded.timestamp
+                WHERE excluded.num_groups < solution_cache.num_groups
+                   OR (excluded.num_groups = solution_cache.num_groups AND excluded.optimal > solution_cache.optimal)
+            ''', (
+                n, k, j, s,
+                len(groups),
+                ';'.join(','.join(str(x) for x in grp) for grp in groups),
+                int(optimal),
+                computation_time,
+                datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            ))
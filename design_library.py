@@ -0,0 +1,129 @@
+import os
+import struct
+import warnings
+import numpy as np
+
+# Precomputed index-level covers for every (n, k, j, s) the GUI accepts,
+# built offline by build_library.py.
+DEFAULT_LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "covering_designs.bin")
+
+# File layout (little endian):
+#   header: magic, version, entry count
+#   index:  one INDEX_DTYPE record per (n, k, j, s), sorted by key
+#   groups: uint32 bitmasks over range(n), one per group
+_MAGIC = b"OSCD"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHxxI")
+INDEX_DTYPE = np.dtype([('key', '<u4'), ('optimal', 'u1'), ('pad', 'u1', 3),
+                        ('offset', '<u4'), ('count', '<u4')])
+
+def library_key(n, k, j, s):
+    """
+    Sort key of an (n, k, j, s) entry: one byte per parameter.
+    """
+    return (n << 24) | (k << 16) | (j << 8) | s
+
+def _group_mask(group):
+    mask = 0
+    for idx in group:
+        mask |= 1 << idx
+    return mask
+
+def _mask_group(mask):
+    return tuple(i for i in range(mask.bit_length()) if mask >> i & 1)
+
+def write_library(path, entries):
+    """
+    Write entries {(n, k, j, s): (groups, optimal)} to path. The file is
+    written next to the target and renamed over it, so readers never see a
+    half-written library.
+    """
+    keys = sorted(entries, key=lambda params: library_key(*params))
+    index = np.zeros(len(keys), dtype=INDEX_DTYPE)
+    masks = []
+    for i, params in enumerate(keys):
+        groups, optimal = entries[params]
+        index[i] = (library_key(*params), bool(optimal), 0, len(masks), len(groups))
+        masks.extend(_group_mask(group) for group in groups)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(keys)))
+        f.write(index.tobytes())
+        f.write(np.array(masks, dtype='<u4').tobytes())
+    os.replace(tmp_path, path)
+
+class DesignLibrary:
+    """
+    Read-only, memory-mapped view of a covering-design library file.
+    A missing file (or path None) gives an empty library, so lookups
+    simply miss.
+    """
+    def __init__(self, path=DEFAULT_LIBRARY_PATH):
+        self.path = path
+        self._index = np.zeros(0, dtype=INDEX_DTYPE)
+        self._masks = np.zeros(0, dtype='<u4')
+        if path is None or not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+            return
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, version, count = _HEADER.unpack(bytes(data[:_HEADER.size]))
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a covering-design library (version {_VERSION})")
+        index_end = _HEADER.size + count * INDEX_DTYPE.itemsize
+        self._index = data[_HEADER.size:index_end].view(INDEX_DTYPE)
+        self._masks = data[index_end:].view('<u4')
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, params):
+        return self._find(*params) is not None
+
+    def _find(self, n, k, j, s):
+        key = library_key(n, k, j, s)
+        pos = int(np.searchsorted(self._index['key'], key))
+        if pos < len(self._index) and self._index['key'][pos] == key:
+            return self._index[pos]
+        return None
+
+    def lookup(self, n, k, j, s):
+        """
+        Stored cover for (n, k, j, s) as {'groups', 'optimal'}, with groups
+        as sorted index tuples, or None if the library has no entry.
+        """
+        entry = self._find(n, k, j, s)
+        if entry is None:
+            return None
+        start = int(entry['offset'])
+        masks = self._masks[start:start + int(entry['count'])]
+        return {'groups': [_mask_group(int(mask)) for mask in masks],
+                'optimal': bool(entry['optimal'])}
+
+    def entries(self):
+        """
+        All stored covers as {(n, k, j, s): (groups, optimal)}.
+        """
+        result = {}
+        for key in self._index['key']:
+            key = int(key)
+            params = (key >> 24, key >> 16 & 0xFF, key >> 8 & 0xFF, key & 0xFF)
+            found = self.lookup(*params)
+            result[params] = (found['groups'], found['optimal'])
+        return result
+
+_default_library = None
+
+def get_default_library():
+    """
+    The library at DEFAULT_LIBRARY_PATH, mapped once per process.
+    A corrupt or outdated file is reported with a warning and treated as
+    empty, so solving still works without it.
+    """
+    global _default_library
+    if _default_library is None:
+        try:
+            _default_library = DesignLibrary()
+        except (OSError, ValueError) as e:
+            warnings.warn(f"Ignoring covering-design library: {e}")
+            _default_library = DesignLibrary(path=None)
+    return _default_library
@@ -0,0 +1,235 @@
+"""
+Headless command-line entry point, for machines without a display.
+
+    python -m optimal_samples solve --m 45 --n 9 --k 6 --j 5 --s 4
+    python -m optimal_samples batch jobs.jsonl --format csv
+    python -m optimal_samples serve --port 8765
+
+Runs the same engine as the GUI (test.py) without importing tkinter and
+stores results in the same DatabaseManager database.
+"""
+import argparse
+import csv
+import datetime
+import json
+import random
+import sys
+
+from algorithm import SolverConfig, remap_groups, solve_with_cache, validate_parameters
+from batch import BatchJob, solve_batch
+from database import DatabaseManager
+import server
+
+def parse_samples(text):
+    return sorted(int(x) for x in text.replace(",", " ").split())
+
+def solve_samples(db, samples, k, j, s, config):
+    """
+    Cover the given samples through the database's solution cache like the
+    GUI does. Returns the solve_with_cache result with groups mapped to
+    sample values.
+    """
+    result = solve_with_cache(db, len(samples), k, j, s, config)
+    result['groups'] = remap_groups(result['groups'], samples)
+    return result
+
+# Batch results are written to the database this many at a time
+SAVE_CHUNK = 100
+
+def save_args(m, samples, k, j, s, groups, computation_time):
+    # DatabaseManager.save_result arguments, with a run ID like the GUI's
+    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    run_id = f"{m}-{len(samples)}-{k}-{j}-{s}-{timestamp}"
+    return m, len(samples), k, j, s, run_id, samples, computation_time, groups
+
+def _record(m, samples, k, j, s, result, result_id, job_id=None):
+    record = {
+        'm': m, 'n': len(samples), 'k': k, 'j': j, 's': s,
+        'samples': list(samples),
+        'num_groups': len(result['groups']),
+        'groups': [list(group) for group in result['groups']],
+        'optimal': result['optimal'],
+        'status': result['status'],
+        'lower_bound': result['lower_bound'],
+        'computation_time': round(result['computation_time'], 3),
+        'result_id': result_id,
+    }
+    if job_id is not None:
+        record = dict(job_id=job_id, **record)
+    return record
+
+CSV_FIELDS = ['job_id', 'm', 'n', 'k', 'j', 's', 'num_groups', 'optimal', 'status',
+              'lower_bound', 'computation_time', 'result_id', 'samples', 'groups']
+
+def _csv_row(record):
+    # samples comma separated, groups ';' separated as in the database
+    row = dict(record)
+    row['samples'] = ','.join(str(x) for x in record['samples'])
+    row['groups'] = ';'.join(','.join(str(x) for x in group) for group in record['groups'])
+    return row
+
+class _Writer:
+    """Streams records as JSON (one object per line) or CSV rows."""
+    def __init__(self, out, fmt):
+        self.out = out
+        self.csv = csv.DictWriter(out, CSV_FIELDS, extrasaction='ignore') if fmt == "csv" else None
+        if self.csv:
+            self.csv.writeheader()
+
+    def write(self, record):
+        if self.csv:
+            self.csv.writerow(_csv_row(record))
+        else:
+            self.out.write(json.dumps(record) + "\n")
+        self.out.flush()
+
+def _describe(error):
+    # MemoryError usually has no message of its own
+    return str(error) or type(error).__name__
+
+def _fail(message):
+    print(f"optimal_samples: error: {message}", file=sys.stderr)
+    return 1
+
+def _config(args, max_time=None):
+    return SolverConfig(max_time=args.time if max_time is None else max_time,
+                        num_workers=args.workers, strategy=args.strategy,
+                        use_library=not args.no_library)
+
+def cmd_solve(args, parser):
+    samples = parse_samples(args.samples) if args.samples else None
+    n = len(samples) if samples else args.n
+    if n is None:
+        parser.error("solve needs --n or --samples")
+    errors = validate_parameters(args.m, n, args.k, args.j, args.s, samples)
+    if errors:
+        parser.error("; ".join(errors))
+    if samples is None:
+        samples = sorted(random.Random(args.seed).sample(range(1, args.m + 1), n))
+
+    db = DatabaseManager(args.db)
+    try:
+        result = solve_samples(db, samples, args.k, args.j, args.s, _config(args))
+    except (MemoryError, ValueError) as e:
+        return _fail(f"cannot solve n={n} k={args.k} j={args.j} s={args.s}: {_describe(e)}")
+    result_id = None
+    if not args.no_save:
+        result_id = db.save_result(*save_args(args.m, samples, args.k, args.j, args.s,
+                                              result['groups'], result['computation_time']))
+    _Writer(args.output, args.format).write(_record(args.m, samples, args.k, args.j, args.s, result, result_id))
+
+def _read_jobs(lines, default_time, seed):
+    # one JSON object per line: m, k, j, s and either samples or n
+    rng = random.Random(seed)
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        spec = json.loads(line)
+        m = spec.get('m', 54)
+        samples = spec.get('samples')
+        if samples is None:
+            samples = sorted(rng.sample(range(1, m + 1), spec['n']))
+        errors = validate_parameters(m, len(samples), spec['k'], spec['j'], spec['s'], samples)
+        if errors:
+            raise ValueError(f"job on line {number}: " + "; ".join(errors))
+        yield BatchJob(sorted(samples), spec['k'], spec['j'], spec['s'],
+                       spec.get('max_time', default_time), spec.get('job_id', number), m)
+
+def cmd_batch(args, parser):
+    try:
+        jobs = list(_read_jobs(args.jobs, args.time, args.seed))
+    except (ValueError, KeyError) as e:
+        parser.error(f"invalid job file: {e}")
+    db = DatabaseManager(args.db)
+    writer = _Writer(args.output, args.format)
+    failed = 0
+    done = []
+
+    # results are stored in chunks, one transaction each
+    def flush():
+        ids = [None] * len(done)
+        if not args.no_save:
+            ids = db.save_results(save_args(job.m, job.samples, job.k, job.j, job.s,
+                                            result['groups'], result['computation_time'])
+                                  for job, result in done)
+        for (job, result), result_id in zip(done, ids):
+            writer.write(_record(job.m, job.samples, job.k, job.j, job.s, result, result_id, job.job_id))
+        done.clear()
+
+    try:
+        for res in solve_batch(jobs, args.processes, _config(args), db):
+            if res.error:
+                failed += 1
+                print(f"job {res.job.job_id} failed: {res.error}", file=sys.stderr)
+                continue
+            done.append((res.job, {'groups': res.groups, 'optimal': res.optimal, 'status': res.status,
+                                   'lower_bound': res.lower_bound, 'computation_time': res.computation_time}))
+            if len(done) >= SAVE_CHUNK:
+                flush()
+    except (MemoryError, ValueError) as e:
+        flush()
+        return _fail(f"batch stopped: {_describe(e)}")
+    flush()
+    return 1 if failed else 0
+
+def cmd_serve(args, parser):
+    # --time is the default budget, requests may override it with max_time
+    server.serve(args.host, args.port, args.db, args.processes, args.max_pending, _config(args),
+                 args.max_time)
+
+def cmd_migrate(args, parser):
+    with DatabaseManager(args.db) as db:
+        converted = db.migrate_to_compact(vacuum=not args.no_vacuum)
+    print(f"Converted {converted} results in {args.db} to the compact encoding")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="optimal_samples",
+                                     description="Optimal samples selection without the GUI")
+    solver = argparse.ArgumentParser(add_help=False)
+    solver.add_argument("--time", type=float, default=60, help="solver time limit in seconds")
+    solver.add_argument("--strategy", choices=["auto", "exact", "greedy", "heuristic"], default="auto")
+    solver.add_argument("--workers", type=int, default=None, help="CP-SAT workers (default: every CPU)")
+    solver.add_argument("--no-library", action="store_true", help="ignore the precomputed covering-design library")
+    solver.add_argument("--db", default="optimal_samples.db", help="SQLite database file")
+    common = argparse.ArgumentParser(add_help=False, parents=[solver])
+    common.add_argument("--no-save", action="store_true", help="do not store results in the database")
+    common.add_argument("--format", choices=["json", "csv"], default="json")
+    common.add_argument("--output", type=argparse.FileType("w"), default=sys.stdout)
+    common.add_argument("--seed", type=int, default=None, help="seed for random sample draws")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solve = commands.add_parser("solve", parents=[common], help="solve one parameter set")
+    solve.add_argument("--m", type=int, required=True)
+    solve.add_argument("--n", type=int)
+    solve.add_argument("--k", type=int, required=True)
+    solve.add_argument("--j", type=int, required=True)
+    solve.add_argument("--s", type=int, required=True)
+    solve.add_argument("--samples", help="explicit samples, e.g. 1,5,9 (default: n random samples from 1..m)")
+    solve.set_defaults(func=cmd_solve)
+
+    batch = commands.add_parser("batch", parents=[common], help="solve a file of JSON-lines jobs")
+    batch.add_argument("jobs", type=argparse.FileType("r"), help="JSON lines with m, k, j, s and samples or n ('-' for stdin)")
+    batch.add_argument("--processes", type=int, default=None, help="solver processes (default: every CPU)")
+    batch.set_defaults(func=cmd_batch)
+
+    serve = commands.add_parser("serve", parents=[solver], help="run the local HTTP/JSON solve service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--processes", type=int, default=None, help="solver processes (default: every CPU)")
+    serve.add_argument("--max-pending", type=int, default=64, help="distinct instances allowed in the queue")
+    serve.add_argument("--max-time", type=float, default=600, help="largest max_time a request may ask for")
+    serve.set_defaults(func=cmd_serve)
+
+    migrate = commands.add_parser("migrate-db", help="convert stored results to the compact encoding")
+    migrate.add_argument("--db", default="optimal_samples.db", help="SQLite database file")
+    migrate.add_argument("--no-vacuum", action="store_true", help="skip compacting the file afterwards")
+    migrate.set_defaults(func=cmd_migrate)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    return args.func(args, parser) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+Local HTTP/JSON solve service, so one machine's cores can serve a team.
+
+    python -m optimal_samples serve --port 8765
+
+POST /solve    {"m": 45, "n": 9, "k": 6, "j": 5, "s": 4, "max_time": 60}
+               (or "samples": [...] instead of n) -> job record, or 400
+               outside the GUI's limits; max_time is capped by --max-time
+GET  /jobs/ID  -> job record: status queued/running/done/failed and, once
+               done, the groups mapped to the job's samples
+GET  /health   -> worker pool and queue sizes
+"""
+import itertools
+import json
+import multiprocessing
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from algorithm import SolverConfig, cached_optimum, process_context, remap_groups, validate_parameters
+from batch import solve_instance
+from database import DatabaseManager
+
+class ServiceFull(Exception):
+    """Raised by SolveService.submit when max_pending instances are queued."""
+
+class SolveService:
+    """
+    Queues solve requests onto a bounded process pool. Identical
+    (n, k, j, s) instances in flight are solved once and shared by every
+    job waiting on them. Proven optima in the database's solution cache
+    are answered immediately; everything else goes through
+    solve_with_cache in a pool process, which also updates the cache.
+    Requests are held to the GUI's parameter limits and their max_time is
+    clamped to max_time_limit seconds.
+    """
+    def __init__(self, db, max_workers=None, max_pending=64, config=None, max_jobs=10000,
+                 max_time_limit=600):
+        self.db = db
+        self.max_time_limit = max_time_limit
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.config = config or SolverConfig()
+        # every pool process gets an equal share of the CPUs for CP-SAT
+        threads = self.config.num_workers or max(1, multiprocessing.cpu_count() // self.max_workers)
+        self.config = replace(self.config, num_workers=threads)
+        # workers are started from request threads, so no plain fork
+        self.pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=process_context())
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._in_flight = {}
+
+    def submit(self, spec):
+        """
+        Register a job from a request dict (m, k, j, s and samples or n,
+        optional max_time). Returns the job's status record.
+        Raises ValueError for invalid requests and ServiceFull when the
+        queue is full.
+        """
+        try:
+            m = int(spec.get('m', 54))
+            k, j, s = int(spec['k']), int(spec['j']), int(spec['s'])
+            samples = spec.get('samples')
+            if samples is not None:
+                samples = sorted(int(x) for x in samples)
+            n = len(samples) if samples is not None else int(spec['n'])
+            max_time = float(spec.get('max_time', self.config.max_time))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"invalid request: {e}")
+        errors = validate_parameters(m, n, k, j, s, samples)
+        if not max_time >= 0:
+            errors.append("max_time must be a non-negative number")
+        if errors:
+            raise ValueError("; ".join(errors))
+        if samples is None:
+            samples = sorted(random.sample(range(1, m + 1), n))
+        max_time = min(max_time, self.max_time_limit)
+        key = (n, k, j, s)
+
+        job = {'id': None, 'm': m, 'samples': samples, 'params': key, 'status': "queued",
+               'submitted': time.time(), 'result': None, 'error': None, 'future': None}
+        cached = cached_optimum(self.db, *key)
+        with self._lock:
+            job['id'] = next(self._ids)
+            future = None
+            if cached is not None:
+                job['status'], job['result'] = "done", cached
+            elif key in self._in_flight:
+                job['future'] = self._in_flight[key]
+            else:
+                if len(self._in_flight) >= self.max_pending:
+                    raise ServiceFull(f"{self.max_pending} instances already queued")
+                config = replace(self.config, max_time=max_time)
+                future = self.pool.submit(solve_instance, *key, config, self.db.db_path)
+                self._in_flight[key] = future
+                job['future'] = future
+            self._jobs[job['id']] = job
+            self._prune()
+            if future is not None:
+                # after the job is registered: an already finished future
+                # runs the callback right here
+                future.add_done_callback(lambda f, key=key: self._finished(key, f))
+        return self.status(job['id'])
+
+    def _finished(self, key, future):
+        # runs on the pool's management thread once an instance is solved
+        error = future.exception()
+        result = None if error else future.result()
+        with self._lock:
+            self._in_flight.pop(key, None)
+            for job in self._jobs.values():
+                if job['future'] is future:
+                    job['future'] = None
+                    if error:
+                        job['status'], job['error'] = "failed", str(error)
+                    else:
+                        job['status'], job['result'] = "done", result
+
+    def _prune(self):
+        # forget the oldest finished jobs beyond max_jobs
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [i for i, job in self._jobs.items() if job['future'] is None][:max(0, excess)]:
+            del self._jobs[job_id]
+
+    def status(self, job_id):
+        """
+        Status record of a job, or None for unknown ids.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            status = job['status']
+            if job['future'] is not None and job['future'].running():
+                status = "running"
+            n, k, j, s = job['params']
+            record = {'job_id': job['id'], 'status': status, 'm': job['m'], 'n': n, 'k': k, 'j': j, 's': s,
+                      'samples': job['samples'], 'submitted': job['submitted']}
+            if job['error']:
+                record['error'] = job['error']
+            result = job['result']
+        if result is not None:
+            record.update({
+                'groups': [list(group) for group in remap_groups(result['groups'], record['samples'])],
+                'num_groups': len(result['groups']),
+                'optimal': result['optimal'],
+                'lower_bound': result['lower_bound'],
+                'computation_time': result['computation_time'],
+                'cached': result['cached'],
+            })
+        return record
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.max_workers, 'in_flight': len(self._in_flight),
+                    'max_pending': self.max_pending, 'jobs': len(self._jobs)}
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+class _Handler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            return self._send(200, self.service.stats())
+        if self.path.startswith("/jobs/"):
+            try:
+                record = self.service.status(int(self.path[len("/jobs/"):]))
+            except ValueError:
+                record = None
+            if record is None:
+                return self._send(404, {'error': "unknown job"})
+            return self._send(200, record)
+        self._send(404, {'error': "not found"})
+
+    def do_POST(self):
+        if self.path != "/solve":
+            return self._send(404, {'error': "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            spec = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(spec, dict):
+                raise ValueError("request body must be a JSON object")
+            record = self.service.submit(spec)
+        except ValueError as e:
+            return self._send(400, {'error': str(e)})
+        except ServiceFull as e:
+            return self._send(503, {'error': str(e)})
+        self._send(200 if record['status'] == "done" else 202, record)
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(service, host="127.0.0.1", port=8765):
+    """
+    ThreadingHTTPServer answering the JSON API above from service.
+    """
+    handler = type("Handler", (_Handler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+def serve(host="127.0.0.1", port=8765, db_path="optimal_samples.db", max_workers=None,
+          max_pending=64, config=None, max_time_limit=600):
+    """
+    Run the solve service until interrupted.
+    """
+    service = SolveService(DatabaseManager(db_path), max_workers, max_pending, config,
+                           max_time_limit=max_time_limit)
+    server = make_server(service, host, port)
+    print(f"Serving on http://{host}:{server.server_address[1]} with {service.max_workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
@@ -6,6 +6,7 @@ def main():
     root = tk.Tk()
     app = OptimalSamplesSelectionSystem(root)
     root.mainloop()
+    app.db.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
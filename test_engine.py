@@ -0,0 +1,184 @@
+"""
+Regression tests for the solver engine, the covering-design library and
+the database encoding, checked against brute force on small instances.
+
+    python -m unittest test_engine
+"""
+import itertools
+import math
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import algorithm
+from algorithm import (SolverConfig, build_coverage, canonical_groups, canonicalize_cover,
+                       colex_combinations, colex_rank, colex_unrank, colex_unrank_array,
+                       lower_bound, solve_cover)
+from database import DatabaseManager, decode_groups, decode_mask, encode_groups, encode_mask, parse_search
+from design_library import DesignLibrary, write_library
+
+def brute_force_coverage(n, groups, j, s):
+    # colex ranks of the j-subsets sharing at least s elements with each group
+    subsets = colex_combinations(n, j)
+    return [sorted(rank for rank, sub in enumerate(subsets) if len(set(sub) & set(grp)) >= s)
+            for grp in groups]
+
+def is_cover(n, groups, j, s):
+    return all(any(len(set(sub) & set(grp)) >= s for grp in groups)
+               for sub in itertools.combinations(range(n), j))
+
+class ColexTest(unittest.TestCase):
+    def test_rank_matches_position(self):
+        for n, r in [(7, 3), (9, 4), (10, 5)]:
+            for rank, subset in enumerate(colex_combinations(n, r)):
+                self.assertEqual(colex_rank(subset), rank)
+                self.assertEqual(colex_unrank(rank, r), subset)
+
+    def test_unrank_array_matches_unrank(self):
+        n, r = 12, 5
+        ranks = list(range(math.comb(n, r)))
+        expected = [colex_unrank(rank, r) for rank in ranks]
+        self.assertEqual([tuple(row) for row in colex_unrank_array(ranks, n, r).tolist()], expected)
+
+class CoverageTest(unittest.TestCase):
+    CASES = [(7, 4, 3, 3), (8, 5, 4, 3), (9, 6, 5, 4), (10, 4, 6, 3)]
+
+    def test_methods_match_brute_force(self):
+        for n, k, j, s in self.CASES:
+            groups = list(itertools.combinations(range(n), k))
+            expected = brute_force_coverage(n, groups, j, s)
+            for method in ("enumerate", "bitmask"):
+                coverage = build_coverage(n, groups, j, s, method=method, workers=1)
+                got = [sorted(coverage.covered_by(g).tolist()) for g in range(len(groups))]
+                self.assertEqual(got, expected, (n, k, j, s, method))
+
+    def test_transpose(self):
+        n, k, j, s = 9, 5, 4, 3
+        groups = list(itertools.combinations(range(n), k))
+        coverage = build_coverage(n, groups, j, s, workers=1)
+        for rank in range(coverage.num_subsets):
+            covering = {g for g in range(len(groups)) if rank in set(coverage.covered_by(g).tolist())}
+            self.assertEqual(set(coverage.covering(rank).tolist()), covering)
+
+    def test_parallel_build_matches(self):
+        n, k, j, s = 12, 6, 5, 4
+        groups = list(itertools.combinations(range(n), k))
+        serial = build_coverage(n, groups, j, s, workers=1)
+        limit = algorithm.PARALLEL_COVERAGE_MIN_NONZEROS
+        algorithm.PARALLEL_COVERAGE_MIN_NONZEROS = 0
+        try:
+            parallel = build_coverage(n, groups, j, s, workers=2)
+        finally:
+            algorithm.PARALLEL_COVERAGE_MIN_NONZEROS = limit
+        self.assertTrue(np.array_equal(serial.group_subsets, parallel.group_subsets))
+        self.assertTrue(np.array_equal(serial.subset_groups, parallel.subset_groups))
+
+class SolverTest(unittest.TestCase):
+    # (n, k, j, s) with known optimum sizes (C(7, 4, 3) = 12, the others by exhaustive search)
+    OPTIMA = {(7, 4, 3, 3): 12, (8, 4, 4, 3): 6, (9, 6, 5, 4): 3}
+
+    def test_symmetry_breaking_keeps_the_optimum(self):
+        for (n, k, j, s), optimum in self.OPTIMA.items():
+            config = SolverConfig(max_time=30, use_library=False, strategy="exact", num_workers=1)
+            result = solve_cover(n, k, j, s, config)
+            self.assertTrue(result['optimal'])
+            self.assertEqual(len(result['groups']), optimum)
+            self.assertTrue(is_cover(n, result['groups'], j, s))
+            self.assertLessEqual(lower_bound(n, k, j, s), optimum)
+
+    def test_without_symmetry_breaking(self):
+        # proving optimality is much slower here, only check the cover
+        for (n, k, j, s), optimum in self.OPTIMA.items():
+            config = SolverConfig(max_time=3, use_library=False, strategy="exact",
+                                  symmetry_breaking=False, num_workers=1)
+            result = solve_cover(n, k, j, s, config)
+            self.assertGreaterEqual(len(result['groups']), optimum)
+            self.assertTrue(is_cover(n, result['groups'], j, s))
+
+    def test_canonicalize_cover(self):
+        n, k = 10, 4
+        groups = [(2, 5, 7, 9), (1, 5, 8, 9), (0, 3, 4, 6)]
+        canonical = canonicalize_cover(groups, n)
+        first, seconds = canonical_groups(n, k)
+        self.assertEqual(canonical[0], first)
+        self.assertIn(canonical[1], seconds)
+        # a relabelling keeps every pairwise overlap
+        for a, b in itertools.combinations(range(len(groups)), 2):
+            self.assertEqual(len(set(groups[a]) & set(groups[b])),
+                             len(set(canonical[a]) & set(canonical[b])))
+
+    def test_greedy_strategy_is_a_cover(self):
+        result = solve_cover(11, 5, 4, 3, SolverConfig(strategy="greedy", use_library=False))
+        self.assertTrue(is_cover(11, result['groups'], 4, 3))
+
+class LibraryTest(unittest.TestCase):
+    def test_round_trip(self):
+        entries = {(7, 4, 3, 3): ([(0, 1, 2, 3), (0, 4, 5, 6)], True),
+                   (9, 6, 5, 4): ([(0, 1, 2, 3, 4, 5), (3, 4, 5, 6, 7, 8)], False)}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "designs.bin")
+            write_library(path, entries)
+            library = DesignLibrary(path)
+            self.assertEqual(len(library), 2)
+            self.assertEqual(library.entries(), entries)
+            self.assertEqual(library.lookup(9, 6, 5, 4), {'groups': entries[(9, 6, 5, 4)][0], 'optimal': False})
+            self.assertIsNone(library.lookup(8, 4, 3, 3))
+
+    def test_missing_and_corrupt_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(len(DesignLibrary(os.path.join(tmp, "missing.bin"))), 0)
+            path = os.path.join(tmp, "bad.bin")
+            with open(path, "wb") as f:
+                f.write(b"XXXX" + bytes(16))
+            with self.assertRaises(ValueError):
+                DesignLibrary(path)
+
+class DatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_mask_encoding(self):
+        for values in ([], [0], [1, 5, 9], [3, 17, 45, 54, 63]):
+            self.assertEqual(decode_mask(encode_mask(values)), values)
+        groups = [[1, 2, 3, 4], [5, 17, 45, 54], [0, 63]]
+        self.assertEqual(decode_groups(encode_groups(groups)), groups)
+
+    def test_result_round_trip(self):
+        samples = [3, 8, 15, 22, 31, 40, 45, 50, 54]
+        groups = [[3, 8, 15, 22, 31, 40], [22, 31, 40, 45, 50, 54]]
+        result_id = self.db.save_result(54, 9, 6, 5, 4, "run", samples, 1.5, groups)
+        loaded = self.db.load_result(result_id)
+        self.assertEqual(loaded['params'], (54, 9, 6, 5, 4))
+        self.assertEqual(list(loaded['samples']), samples)
+        self.assertEqual([list(grp) for grp in loaded['groups']], groups)
+
+    def test_keyset_paging_matches_full_query(self):
+        self.db.save_results((45, 7 + i % 5, 6, 5, 4, f"run-{i}", list(range(1, 8 + i % 5)), 0.1, [[1, 2, 3, 4, 5, 6]])
+                             for i in range(53))
+        full = self.db.query_results()
+        pages, after = [], None
+        while True:
+            page = self.db.query_results(limit=10, after=after)
+            pages.extend(page)
+            if len(page) < 10:
+                break
+            after = (page[-1][7], page[-1][0])
+        self.assertEqual(pages, full)
+        self.assertEqual(len(self.db.query_results(n=9)), len([row for row in full if row[2] == 9]))
+
+    def test_parse_search(self):
+        self.assertEqual(parse_search("n=9 k>=5"), {'n': (9, 9), 'k': (5, None)})
+        self.assertEqual(parse_search("before:2025-05"), {'until': "2025-05"})
+        self.assertEqual(parse_search("after:2025-05-04"), {'since': "2025-05-05"})
+        self.assertEqual(parse_search("9"), {'value': 9})
+        self.assertEqual(parse_search("20250427"), {'text': "20250427"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, font
-import itertools
 import random
 import datetime
 import time
-import sqlite3
-import multiprocessing
-from ortools.sat.python import cp_model
-from database import DatabaseManager
+import queue
+import threading
+from database import DatabaseManager, parse_search
+from design_library import get_default_library
+from algorithm import CancellationToken, SolverConfig, improve_optimized_samples, remap_groups, solve_with_cache
 
 class ModernUI(ttk.Frame):
     """Custom styling for a modern UI look"""
@@ -217,8 +217,11 @@ class OptimalSamplesSelectionSystem:
         self.k_var = tk.IntVar(value=6)
         self.j_var = tk.IntVar(value=5)
         self.s_var = tk.IntVar(value=4)
+        self.time_limit_var = tk.IntVar(value=60)
         self.selected_samples = []
         self.results = []
+        # (m, samples, k, j, s) the displayed results were computed for
+        self.result_params = None
         self.computation_time = 0
         
         # Range variables
@@ -233,7 +236,9 @@ class OptimalSamplesSelectionSystem:
         self._computation_progress = "Starting..."
         
         # Setup database
-        self.setup_database()
+        self.db = DatabaseManager()
+        # Map the precomputed covers now so lookups during solving are instant
+        self.library = get_default_library()
         
         # Create UI
         self.create_ui()
@@ -241,47 +246,6 @@ class OptimalSamplesSelectionSystem:
         # Set up dynamic validation
         self.setup_dynamic_validation()
     
-    def setup_database(self):
-        # Create database if it doesn't exist
-        conn = sqlite3.connect('optimal_samples.db')
-        cursor = conn.cursor()
-        
-        # Create table for results
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            m INTEGER,
-            n INTEGER,
-            k INTEGER,
-            j INTEGER,
-            s INTEGER,
-            run_id TEXT,
-            num_results INTEGER,
-            samples TEXT,
-            timestamp TEXT,
-            computation_time REAL
-        )
-        ''')
-        # 为现有数据库添加 computation_time 列（若不存在）
-        try:
-            cursor.execute("ALTER TABLE results ADD COLUMN computation_time REAL")
-        except sqlite3.OperationalError:
-            pass
-        
-        # Create table for result groups
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS result_groups (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            result_id INTEGER,
-            group_num INTEGER,
-            group_samples TEXT,
-            FOREIGN KEY (result_id) REFERENCES results (id)
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
-    
     def create_ui(self):
         # App header
         header_frame = ttk.Frame(self.root)
@@ -375,9 +339,15 @@ class OptimalSamplesSelectionSystem:
         )
         s_input.grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
         
+        time_input = ParameterInput(
+            param_grid, "Time limit (s):", self.time_limit_var, 1, 3600,
+            tooltip_text="Solver time budget in seconds; the best cover found so far is used when it runs out"
+        )
+        time_input.grid(row=4, column=1, sticky=tk.W, padx=5, pady=5)
+        
         # Performance options
         perf_frame = ttk.Frame(param_grid)
-        perf_frame.grid(row=4, column=1, sticky=tk.W, padx=5, pady=5)
+        perf_frame.grid(row=5, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
         
         self.use_optimized = tk.BooleanVar(value=True)
         ttk.Checkbutton(perf_frame, text="Use optimized algorithm for large n", 
@@ -530,6 +500,7 @@ class OptimalSamplesSelectionSystem:
         
         ttk.Button(action_frame, text="💾 Save to Database", style="Accent.TButton", command=self.save_to_database).pack(side=tk.LEFT, padx=5, pady=5)
         ttk.Button(action_frame, text="🗑️ Clear Results", command=self.clear_results).pack(side=tk.LEFT, padx=5, pady=5)
+        ttk.Button(action_frame, text="✨ Improve Cover", command=self.improve_results).pack(side=tk.LEFT, padx=5, pady=5)
     
     def setup_database_tab(self):
         # Database controls
@@ -548,8 +519,11 @@ class OptimalSamplesSelectionSystem:
         self.search_var = tk.StringVar()
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=30)
         search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<Return>", lambda event: self.search_database())
         ttk.Button(search_frame, text="🔍 Search", command=self.search_database).pack(side=tk.LEFT, padx=5)
         ttk.Button(search_frame, text="❌ Clear", command=self.clear_search).pack(side=tk.LEFT, padx=5)
+        ttk.Label(search_frame, text="e.g. n=9 k=6  s>=4  n=7-12  2025-04  since:2025-01-01",
+                  foreground="gray").pack(side=tk.LEFT, padx=10)
         
         # Database results list
         list_frame = ttk.LabelFrame(self.database_tab, text="Result History", padding=(15, 10))
@@ -562,8 +536,14 @@ class OptimalSamplesSelectionSystem:
         scrollbar_x = ttk.Scrollbar(list_frame, orient="horizontal")
         scrollbar_x.pack(side=tk.BOTTOM, fill=tk.X)
         
+        # Rows are fetched a page at a time as the view scrolls
+        self._history_filters = {}
+        self._history_after = None
+        self._history_done = False
+        self._history_pending = False
         self.tree = ttk.Treeview(list_frame, columns=("ID", "Parameters", "Samples", "Groups", "Date", "Computation Time"), 
-                                 show="headings", yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+                                 show="headings", xscrollcommand=scrollbar_x.set,
+                                 yscrollcommand=lambda first, last: self._on_history_scroll(scrollbar_y, first, last))
         self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         scrollbar_y.config(command=self.tree.yview)
         scrollbar_x.config(command=self.tree.xview)
@@ -595,48 +575,15 @@ class OptimalSamplesSelectionSystem:
     
     def search_database(self):
         search_term = self.search_var.get().strip().lower()
-        if not search_term:
-            self.refresh_database_list()
-            return
-            
-        # Clear current items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Search in database
-        try:
-            conn = sqlite3.connect('optimal_samples.db')
-            cursor = conn.cursor()
-            
-            # Search by parameters or date
-            cursor.execute('''
-            SELECT id, m, n, k, j, s, num_results, timestamp, computation_time
-            FROM results
-            WHERE LOWER(timestamp) LIKE ? OR 
-                  m LIKE ? OR n LIKE ? OR k LIKE ? OR j LIKE ? OR s LIKE ?
-            ORDER BY timestamp DESC
-            ''', (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%', 
-                  f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'))
-            
-            for i, row in enumerate(cursor.fetchall()):
-                id, m, n, k, j, s, num_results, timestamp, computation_time = row
-                self.tree.insert('', 'end', values=(
-                    id,
-                    f"m={m}, n={n}, k={k}, j={j}, s={s}",
-                    n,
-                    num_results,
-                    timestamp,
-                    f"{computation_time:.2f} seconds"
-                ), tags=('even' if i % 2 == 0 else 'odd'))
-            
-            conn.close()
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error searching database: {str(e)}")
+        # Parameter filters, dates and free text (see database.parse_search)
+        self._history_filters = parse_search(search_term) if search_term else {}
+        self.refresh_database_list()
+        if search_term:
+            self.status_var.set(f"Showing results matching '{search_term}'")
     
     def clear_search(self):
         self.search_var.set("")
-        self.refresh_database_list()
+        self.search_database()
     
     def validate_parameters(self):
         try:
@@ -876,8 +823,9 @@ class OptimalSamplesSelectionSystem:
             info_label = ttk.Label(progress_dialog, textvariable=info_var)
             info_label.pack(pady=5)
             
-            cancel_button = ttk.Button(progress_dialog, text="Cancel", command=lambda: setattr(self, '_cancel_computation', True))
+            cancel_button = ttk.Button(progress_dialog, text="Cancel", command=self.cancel_computation)
             cancel_button.pack(pady=15)
+            progress_dialog.protocol("WM_DELETE_WINDOW", self.cancel_computation)
             
             # Center dialog
             progress_dialog.update_idletasks()
@@ -889,31 +837,62 @@ class OptimalSamplesSelectionSystem:
             
             # For cancellation
             self._cancel_computation = False
+            self._cancel_token = CancellationToken()
+            self._computation_progress = "Starting..."
+            config = SolverConfig(max_time=self.time_limit_var.get(),
+                                  strategy="auto" if self.use_optimized.get() else "exact")
+            
+            # Run the solver in a worker thread; Tk is only touched from the
+            # main thread, which polls the result queue with root.after
+            start_time = time.time()
+            result_queue = queue.Queue()
+            
+            def worker():
+                try:
+                    result_queue.put((self.run_solver(k, j, s, config), None))
+                except Exception as e:
+                    result_queue.put((None, e))
+            
+            threading.Thread(target=worker, daemon=True).start()
             
             # Set up a monitoring function for long computations
             def update_progress():
-                if hasattr(self, '_computation_progress'):
-                    # Update progress info if available
-                    info_var.set(f"Working with n={n}, k={k}, j={j}, s={s}\n{self._computation_progress}")
+                # Update progress info if available
+                info_var.set(f"Working with n={n}, k={k}, j={j}, s={s}\n{self._computation_progress}")
+                
+                try:
+                    result, error = result_queue.get_nowait()
+                except queue.Empty:
+                    progress_dialog.after(200, update_progress)
+                    return
                 
-                if not self._cancel_computation:
-                    progress_dialog.after(500, update_progress)
+                # Close progress dialog
+                progress_dialog.destroy()
+                if error is not None:
+                    messagebox.showerror("Error", f"Computation error: {str(error)}")
+                self.show_computation_result(result['groups'] if result else [], m, n, k, j, s,
+                                             time.time() - start_time, result=result)
             
             # Start progress updates
             update_progress()
             
-            # Start computation in the main thread
-            start_time = time.time()
-            try:
-                k_groups = self.compute_optimized_samples(k, j, s)
-            except Exception as e:
-                messagebox.showerror("Error", f"Computation error: {str(e)}")
-                k_groups = []
-            
-            # Close progress dialog
-            progress_dialog.destroy()
-            
-            if self._cancel_computation:
+        except Exception as e:
+            self.status_indicator.config(foreground=self.ui.error_color)
+            self.status_var.set(f"Error: {str(e)}")
+            messagebox.showerror("Error", str(e))
+    
+    def cancel_computation(self):
+        self._cancel_computation = True
+        self._computation_progress = "Cancelling..."
+        if getattr(self, '_cancel_token', None) is not None:
+            self._cancel_token.cancel()
+    
+    def show_computation_result(self, k_groups, m, n, k, j, s, computation_time, samples=None, result=None):
+        # result: the solver's dict (optimal, lower_bound, gap), if known
+        try:
+            # A cancelled run still returns the best cover found so far
+            cancelled = self._cancel_computation
+            if cancelled and not k_groups:
                 self.status_indicator.config(foreground=self.ui.warning_color)
                 self.status_var.set("Computation cancelled")
                 return
@@ -925,6 +904,7 @@ class OptimalSamplesSelectionSystem:
                 return
             
             self.results = k_groups
+            self.result_params = (m, list(self.selected_samples if samples is None else samples), k, j, s)
             
             # Switch to results tab
             self.notebook.select(self.results_tab)
@@ -939,136 +919,101 @@ class OptimalSamplesSelectionSystem:
                 self.results_text.insert(tk.END, f"{i}. ", "group_number")
                 self.results_text.insert(tk.END, f"{formatted_group}\n", "group_content")
             
-            computation_time = time.time() - start_time
             self.computation_time = computation_time
             self.results_text.insert(tk.END, f"\nFound {len(k_groups)} groups of {k} samples in {computation_time:.2f} seconds.", "summary")
+            if result is not None and not result['optimal']:
+                self.results_text.insert(tk.END, f"\nNot proven optimal: lower bound {result['lower_bound']}, "
+                                                 f"gap {result['gap']}.", "summary")
             
+            if cancelled:
+                self.status_indicator.config(foreground=self.ui.warning_color)
+                self.status_var.set(f"Cancelled: best {len(k_groups)} groups so far after "
+                                    f"{computation_time:.2f} seconds, not proven optimal")
+                return
             self.status_indicator.config(foreground=self.ui.success_color)
-            self.status_var.set(f"Found {len(k_groups)} optimal groups in {computation_time:.2f} seconds")
+            if result is not None and result['optimal']:
+                self.status_var.set(f"Found {len(k_groups)} optimal groups in {computation_time:.2f} seconds")
+            elif result is not None:
+                self.status_var.set(f"Found {len(k_groups)} groups in {computation_time:.2f} seconds "
+                                    f"(lower bound {result['lower_bound']}, gap {result['gap']})")
+            else:
+                self.status_var.set(f"Found {len(k_groups)} groups in {computation_time:.2f} seconds")
             
         except Exception as e:
             self.status_indicator.config(foreground=self.ui.error_color)
             self.status_var.set(f"Error: {str(e)}")
             messagebox.showerror("Error", str(e))
     
-    def compute_optimized_samples(self, k, j, s):
-        """Hybrid greedy hint + CP-SAT for exact set cover with upper bound"""
+    def run_solver(self, k, j, s, config):
+        """
+        Solve with the shared algorithm engine, reusing cached covers.
+        Returns the solve_with_cache result with groups as sample values.
+        """
         samples = self.selected_samples
         n = len(samples)
 
-        # 1. Generate all j-subsets
-        j_subsets = list(itertools.combinations(range(n), j))
-        # 2. Generate all k-groups
-        k_groups = list(itertools.combinations(range(n), k))
-
-        # 3. Compute coverage for each k-group and filter out those that cover nothing
-        group_cov = []
-        for kg in k_groups:
-            cov_js = [idx for idx, js in enumerate(j_subsets) if len(set(kg) & set(js)) >= s]
-            group_cov.append(cov_js)
-        valid_idx = [i for i, covs in enumerate(group_cov) if covs]
-        k_groups = [k_groups[i] for i in valid_idx]
-        group_cov = [group_cov[i] for i in valid_idx]
-
-        # 4. Create CP-SAT model and bool vars
-        model = cp_model.CpModel()
-        x_vars = [model.NewBoolVar(f'x{i}') for i in range(len(k_groups))]
-
-        # 5. Cover constraints via AddBoolOr
-        for j_idx in range(len(j_subsets)):
-            cov_list = [x_vars[i] for i, covs in enumerate(group_cov) if j_idx in covs]
-            if cov_list:
-                model.AddBoolOr(cov_list)
-
-        # Objective: minimize number of groups
-        model.Minimize(sum(x_vars))
-
-        # Solver parameters
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 60
-        # 使用所有 CPU 物理核心
-        solver.parameters.num_search_workers = multiprocessing.cpu_count()
+        # Stream each improved incumbent to the progress dialog
+        def report(info):
+            self._computation_progress = (f"Best so far: {info['objective']} groups "
+                                          f"(lower bound {info['bound']}, {info['wall_time']:.1f}s)")
 
-        status = solver.Solve(model)
-        raw = []
-        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-            for i, var in enumerate(x_vars):
-                if solver.Value(var):
-                    raw.append(k_groups[i])
+        # The cover only depends on (n, k, j, s): the cache answers repeats
+        result = solve_with_cache(self.db, n, k, j, s, config, report, self._cancel_token)
         # 将索引组映射回实际样本值
-        return [tuple(samples[idx] for idx in grp) for grp in raw]
+        result['groups'] = remap_groups(result['groups'], samples)
+        return result
     
-    def generate_diverse_k_groups(self, n, k, max_groups):
-        """Generate a diverse set of k-groups for better coverage"""
-        all_indices = list(range(n))
-        k_groups = []
-        
-        # Update status
-        self._computation_progress = f"Generating diverse k-groups..."
-        self.root.update()
-        
-        # Start with some random groups to ensure diversity
-        initial_groups = min(max_groups // 4, 100)
-        for i in range(initial_groups):
-            if i % 10 == 0:
-                self._computation_progress = f"Generating initial groups ({i}/{initial_groups})..."
-                self.root.update()
-                
-                if self._cancel_computation:
-                    return k_groups
-                    
-            k_groups.append(tuple(sorted(random.sample(all_indices, k))))
-        
-        # Then generate groups with more structure to improve coverage
-        strategies = ["core", "spaced", "clusters", "random"]
-        strategy_idx = 0
-        
-        while len(k_groups) < max_groups:
-            strategy = strategies[strategy_idx % len(strategies)]
-            strategy_idx += 1
+    def improve_results(self):
+        try:
+            if not self.results:
+                messagebox.showerror("Error", "No results to improve")
+                return
+            
+            # Improve against what the cover was computed for, not the
+            # parameters currently in the inputs
+            m, samples, k, j, s = self.result_params
+            n = len(samples)
+            groups = [tuple(group) for group in self.results]
+            budget = self.time_limit_var.get()
+            
+            self.status_indicator.config(foreground=self.ui.warning_color)
+            self.status_var.set(f"Improving cover of {len(groups)} groups for up to {budget} seconds...")
+            
+            # Local search runs in a worker thread like the solver
+            start_time = time.time()
+            result_queue = queue.Queue()
+            
+            def worker():
+                try:
+                    result_queue.put((improve_optimized_samples(samples, groups, k, j, s, budget), None))
+                except Exception as e:
+                    result_queue.put((groups, e))
+            
+            threading.Thread(target=worker, daemon=True).start()
             
-            if len(k_groups) % 100 == 0:
-                self._computation_progress = f"Generating k-groups: {len(k_groups)}/{max_groups} using {strategy} strategy"
-                self.root.update()
+            def poll():
+                try:
+                    improved, error = result_queue.get_nowait()
+                except queue.Empty:
+                    self.root.after(200, poll)
+                    return
                 
-                if self._cancel_computation:
-                    return k_groups
-            
-            if strategy == "core":
-                # Strategy 1: Build around a small core of 2-3 elements
-                core_size = min(k-1, 3)
-                core = random.sample(all_indices, core_size)
-                remaining = [i for i in all_indices if i not in core]
-                rest = random.sample(remaining, k-core_size)
-                new_group = tuple(sorted(core + rest))
-            
-            elif strategy == "spaced":
-                # Strategy 2: Ensure we have groups that maximize distance between elements
-                # Take elements that are spaced apart
-                step = max(1, n // k)
-                start = random.randint(0, n-1)
-                new_group = tuple(sorted((start + i*step) % n for i in range(k)))
-            
-            elif strategy == "clusters":
-                # Strategy 3: Form clusters in different regions
-                # Pick a region and select elements close to each other
-                center = random.randint(0, n-1)
-                window = min(n, k*2)  # Double the window size to ensure enough elements
-                region = [(center + i) % n for i in range(-window//2, window//2)]
-                if len(region) >= k:
-                    new_group = tuple(sorted(random.sample(region, k)))
+                if error is not None:
+                    messagebox.showerror("Error", f"Improvement error: {str(error)}")
+                if len(improved) < len(groups):
+                    self._cancel_computation = False
+                    self.show_computation_result(improved, m, n, k, j, s,
+                                                 self.computation_time + time.time() - start_time, samples)
                 else:
-                    new_group = tuple(sorted(random.sample(all_indices, k)))
+                    self.status_indicator.config(foreground=self.ui.success_color)
+                    self.status_var.set(f"No smaller cover found than {len(groups)} groups")
             
-            else:  # "random"
-                # Strategy 4: Pure random sampling
-                new_group = tuple(sorted(random.sample(all_indices, k)))
+            poll()
             
-            # Only add if this is a new group
-            if new_group not in k_groups:
-                k_groups.append(new_group)
-        
-        return k_groups
+        except Exception as e:
+            self.status_indicator.config(foreground=self.ui.error_color)
+            self.status_var.set(f"Error: {str(e)}")
+            messagebox.showerror("Error", str(e))
     
     def save_to_database(self):
         try:
@@ -1076,40 +1021,16 @@ class OptimalSamplesSelectionSystem:
                 messagebox.showerror("Error", "No results to save")
                 return
             
-            m = self.m_var.get()
-            n = len(self.selected_samples)
-            k = self.k_var.get()
-            j = self.j_var.get()
-            s = self.s_var.get()
+            m, samples, k, j, s = self.result_params
+            n = len(samples)
             
             # Generate a unique run ID
             timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
             run_id = f"{m}-{n}-{k}-{j}-{s}-{timestamp}"
             
             # Save to database
-            conn = sqlite3.connect('optimal_samples.db')
-            cursor = conn.cursor()
-            
-            # Insert into results table
-            cursor.execute('''
-            INSERT INTO results (m, n, k, j, s, run_id, num_results, samples, timestamp, computation_time)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (m, n, k, j, s, run_id, len(self.results), 
-                 ','.join(str(s) for s in self.selected_samples),
-                 datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                 self.computation_time))
-            
-            result_id = cursor.lastrowid
-            
-            # Insert groups
-            for i, group in enumerate(self.results, 1):
-                cursor.execute('''
-                INSERT INTO result_groups (result_id, group_num, group_samples)
-                VALUES (?, ?, ?)
-                ''', (result_id, i, ','.join(str(s) for s in group)))
-            
-            conn.commit()
-            conn.close()
+            result_id = self.db.save_result(m, n, k, j, s, run_id, samples,
+                                            self.computation_time, self.results)
             
             # Display success message with custom dialog
             success_dialog = tk.Toplevel(self.root)
@@ -1132,8 +1053,12 @@ class OptimalSamplesSelectionSystem:
             y = self.root.winfo_y() + (self.root.winfo_height() - success_dialog.winfo_height()) // 2
             success_dialog.geometry(f"+{x}+{y}")
             
-            # Refresh database list
-            self.refresh_database_list()
+            # Show the new result at the top of the history
+            row = self.db.get_result_row(result_id)
+            if row and not self._history_filters:
+                children = self.tree.get_children()
+                self.tree.insert('', 0, iid=str(result_id), values=self._history_values(row),
+                                 tags=self._stripe_after(children[0] if children else None))
             
         except Exception as e:
             self.status_indicator.config(foreground=self.ui.error_color)
@@ -1142,43 +1067,68 @@ class OptimalSamplesSelectionSystem:
     
     def clear_results(self):
         self.results = []
+        self.result_params = None
         self.results_text.delete(1.0, tk.END)
         self.result_header_var.set("No results available")
     
+    # Rows fetched per history page
+    HISTORY_PAGE_SIZE = 100
+    
+    def _history_values(self, row):
+        id, m, n, k, j, s, num_results, timestamp, computation_time = row
+        return (id, f"m={m}, n={n}, k={k}, j={j}, s={s}", n, num_results, timestamp,
+                f"{computation_time:.2f} seconds")
+    
+    def _stripe_after(self, item):
+        # Stripe tag for a row placed next to item (None: an empty tree)
+        if item is None:
+            return ('even',)
+        return ('odd',) if 'even' in self.tree.item(item, 'tags') else ('even',)
+    
+    def _retag_history(self, item):
+        # Flip the stripes from item down, after the row above it was removed
+        while item:
+            self.tree.item(item, tags=self._stripe_after(item))
+            item = self.tree.next(item)
+    
     def refresh_database_list(self):
-        # Clear current items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Get items from database
+        # Clear current items and start again from the newest page
+        self.tree.delete(*self.tree.get_children())
+        self._history_after = None
+        self._history_done = False
+        self.load_more_history()
+    
+    def load_more_history(self):
+        """Append the next page of the history to the tree"""
+        self._history_pending = False
+        if self._history_done:
+            return
         try:
-            conn = sqlite3.connect('optimal_samples.db')
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            SELECT id, m, n, k, j, s, num_results, timestamp, computation_time
-            FROM results
-            ORDER BY timestamp DESC
-            ''')
-            
-            for i, row in enumerate(cursor.fetchall()):
-                id, m, n, k, j, s, num_results, timestamp, computation_time = row
-                self.tree.insert('', 'end', values=(
-                    id,
-                    f"m={m}, n={n}, k={k}, j={j}, s={s}",
-                    n,
-                    num_results,
-                    timestamp,
-                    f"{computation_time:.2f} seconds"
-                ), tags=('even' if i % 2 == 0 else 'odd'))
-            
-            conn.close()
+            rows = self.db.query_results(limit=self.HISTORY_PAGE_SIZE, after=self._history_after,
+                                         **self._history_filters)
+            children = self.tree.get_children()
+            last = children[-1] if children else None
+            for row in rows:
+                last = self.tree.insert('', 'end', iid=str(row[0]), values=self._history_values(row),
+                                        tags=self._stripe_after(last))
+            if rows:
+                # keyset cursor: (timestamp, id) of the last loaded row
+                self._history_after = (rows[-1][7], rows[-1][0])
+            self._history_done = len(rows) < self.HISTORY_PAGE_SIZE
             
         except Exception as e:
+            self._history_done = True
             self.status_indicator.config(foreground=self.ui.error_color)
             self.status_var.set(f"Error loading database: {str(e)}")
             messagebox.showerror("Error", f"Error loading database: {str(e)}")
     
+    def _on_history_scroll(self, scrollbar, first, last):
+        scrollbar.set(first, last)
+        # Fetch the next page once the view nears the end of the loaded rows
+        if float(last) > 0.9 and not self._history_done and not self._history_pending:
+            self._history_pending = True
+            self.root.after_idle(self.load_more_history)
+    
     def load_selected_result(self):
         try:
             selection = self.tree.selection()
@@ -1190,23 +1140,13 @@ class OptimalSamplesSelectionSystem:
             result_id = item['values'][0]
             
             # Load result from database
-            conn = sqlite3.connect('optimal_samples.db')
-            cursor = conn.cursor()
-            
-            # Get result info
-            cursor.execute('''
-            SELECT m, n, k, j, s, samples, computation_time
-            FROM results
-            WHERE id = ?
-            ''', (result_id,))
-            
-            result_info = cursor.fetchone()
+            result_info = self.db.load_result(result_id)
             if not result_info:
                 messagebox.showerror("Error", "Result not found")
-                conn.close()
                 return
             
-            m, n, k, j, s, samples_str, computation_time = result_info
+            m, n, k, j, s = result_info['params']
+            computation_time = result_info['computation_time']
             
             # Set parameters
             self.m_var.set(m)
@@ -1216,27 +1156,14 @@ class OptimalSamplesSelectionSystem:
             self.s_var.set(s)
             
             # Set samples
-            self.selected_samples = [int(s) for s in samples_str.split(',')]
+            self.selected_samples = result_info['samples']
             self.samples_display.delete(1.0, tk.END)
             self.samples_display.insert(tk.END, ', '.join(f"{s:02d}" for s in self.selected_samples))
             
-            # Get groups
-            cursor.execute('''
-            SELECT group_samples
-            FROM result_groups
-            WHERE result_id = ?
-            ORDER BY group_num
-            ''', (result_id,))
-            
-            groups = []
-            for row in cursor.fetchall():
-                group_samples = [int(s) for s in row[0].split(',')]
-                groups.append(group_samples)
-            
-            conn.close()
-            
             # Store and display results
+            groups = result_info['groups']
             self.results = groups
+            self.result_params = (m, list(self.selected_samples), k, j, s)
             
             # Update results header
             self.result_header_var.set(f"Results for m={m}, n={n}, k={k}, j={j}, s={s}")
@@ -1294,17 +1221,13 @@ class OptimalSamplesSelectionSystem:
             def confirm_delete():
                 try:
                     # Delete from database
-                    conn = sqlite3.connect('optimal_samples.db')
-                    cursor = conn.cursor()
-                    
-                    cursor.execute('DELETE FROM result_groups WHERE result_id = ?', (result_id,))
-                    cursor.execute('DELETE FROM results WHERE id = ?', (result_id,))
-                    
-                    conn.commit()
-                    conn.close()
+                    self.db.delete_result(result_id)
                     
-                    # Refresh list
-                    self.refresh_database_list()
+                    # Remove the row without reloading the list
+                    if self.tree.exists(str(result_id)):
+                        below = self.tree.next(str(result_id))
+                        self.tree.delete(str(result_id))
+                        self._retag_history(below)
                     
                     self.status_indicator.config(foreground=self.ui.success_color)
                     self.status_var.set(f"Deleted result ID {result_id}")